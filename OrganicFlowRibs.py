@@ -18,6 +18,10 @@ if SRC_DIR not in sys.path:
 
 import ui_builder
 import generator
+from flow_core import parallel
+from flow_core import precompute
+from flow_core import profiles
+from flow_core import surface
 
 _handlers = []
 
@@ -45,6 +49,10 @@ def run(context):
 def stop(context):
     # Optional: provides a clean shutdown path
     try:
+        parallel.shutdown()
+        precompute.PRECOMPUTE.shutdown()
+        surface.CACHE.clear()
+        profiles.forget_profiles()
         adsk.terminate()
     except:
         pass
@@ -12,6 +12,9 @@ DEFAULTS_MAIN = {
     "rib_thickness_in": 0.75,
     "gap_between_ribs_in": 1.0,
     "layout_along_y": True,
+
+    # All ribs as named bodies in one component (instead of one component each)
+    "single_component": False,
 }
 
 # ----------------------------
@@ -50,6 +53,40 @@ DEFAULTS_FLOW = {
 DEFAULTS_QUALITY = {
     "samples": 420,
     "smooth_passes": 2,
+
+    # Evaluate rib profiles in a worker-process pool (large rib counts)
+    "parallel_profiles": False,
+
+    # Send only the fit points the fitted spline needs to stay within
+    # tolerance of the profile
+    "adaptive_sampling": False,
+    "sample_tolerance_in": 0.002,
+
+    # Douglas-Peucker pass over the fit points (same tolerance, measured
+    # vertically on the fitted spline)
+    "decimate_points": False,
+
+    # Least-squares NURBS from control points instead of fitted splines
+    "nurbs_curves": False,
+    "nurbs_max_control_points": 400,
+
+    # Suspend sketch solving while profile entities are added
+    "defer_sketch_compute": True,
+
+    # Build rib solids directly (B-rep) instead of sketch + extrude
+    "brep_ribs": False,
+
+    # All ribs in one sketch + one extrude, placed by a few batched moves
+    "batch_sketch": False,
+
+    # Ribs with the same profile (within tolerance) share one component
+    "dedupe_profiles": False,
+
+    # Render-only runs: ribs as triangle mesh bodies, no solids
+    "mesh_bodies": False,
+
+    # Stream profiles from a worker thread while ribs are being built
+    "pipeline_ribs": False,
 }
 
 # ----------------------------
@@ -62,6 +99,20 @@ DEFAULTS_TABS = {
     "tab_centers_in": [16.0, 32.0],
 }
 
+# ----------------------------
+# Live preview (executePreview)
+# ----------------------------
+DEFAULTS_PREVIEW = {
+    "live_preview": True,
+    "max_ribs": 40,      # every Nth rib, so at most this many are drawn
+    "points": 32,        # spline points per previewed rib
+    "budget_s": 0.3,     # stop adding ribs after this long
+
+    # Whole sculpture as one custom-graphics triangle mesh instead
+    "mesh_preview": True,
+    "mesh_points": 200,  # samples per rib in the mesh
+}
+
 # ----------------------------
 # Validation limits
 # ----------------------------
@@ -86,6 +137,8 @@ LIMITS = {
 
     "samples": (80, 1200),
     "smooth_passes": (0, 10),
+    "sample_tolerance_in": (0.0002, 0.05),
+    "nurbs_max_control_points": (8, 1050),
 
     "tab_width_in": (0.5, 12.0),
     "tab_height_in": (0.1, 3.0),
@@ -2,20 +2,52 @@
 # Reads dialog inputs and generates the model by calling geometry.py
 
 from logging import root
-import math
 import adsk.core
 import adsk.fusion
+import time
 import traceback
 import importlib
+from contextlib import contextmanager
 
+import config
 import geometry
 from backer_panel import backer
 from wall import wall
-from util import delete_containers_with_prefix
-from util import _delete_old_runs
+from util import delete_entities
+from util import find_runs
+from util import get_attr
+from util import new_run_id
+from util import register_run
+from util import set_attr
+from flow_core.dedupe import fingerprint
+from flow_core.precompute import PRECOMPUTE
+from flow_core.report import RunReport
+from progress import Progress
 importlib.reload(backer)
 importlib.reload(wall)
 
+# Seconds per rib of the last run in each build mode ("bulk" / "parametric"),
+# kept for the session so the run report can compare the two
+_build_rates = {}
+
+# Same per rib body builder ("mesh" / "B-rep" / "sketch"), timed over the
+# rib phases only
+_body_rates = {}
+_RIB_PHASES = (
+    "rib sketches", "rib extrudes", "rib bodies (B-rep)", "rib bodies (mesh)",
+    "mesh buffers", "rib placement", "ribs",
+)
+
+# Custom-graphics mesh preview currently on screen (not part of the design,
+# so it outlives the command preview until clear_preview)
+_mesh_group = None
+
+# Rib inputs the backer panel depends on
+_BACKER_KEYS = (
+    "rib_count", "rib_length_in", "rib_thickness_in", "gap_between_ribs_in", "layout_along_y",
+    "add_tabs", "tab_width_in", "tab_height_in", "tab_centers_in",
+)
+
 
 def _val_in(inputs, input_id: str) -> float:
     """
@@ -49,135 +81,407 @@ def _parse_csv_floats(text: str):
     return out
 
 
+@contextmanager
+def _history_capture_off(design, enabled: bool, report):
+    """
+    Bulk build: switches a parametric design to direct modeling for the
+    enclosed block, so components, sketches and extrudes don't pile up as
+    timeline features, then turns history capture back on. Fusion flattens
+    the existing timeline into base features when capture is turned off,
+    so a design that already has history is only switched after the user
+    confirms; otherwise the run builds with history as usual.
+    """
+    if not enabled or design.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+        yield
+        return
+
+    if design.timeline.count > 0:
+        answer = adsk.core.Application.get().userInterface.messageBox(
+            "Bulk build turns off history capture while it runs. Fusion will flatten "
+            f"this design's existing timeline ({design.timeline.count} features) into "
+            "base features; their parametric history is lost.\n\n"
+            "Continue with history capture off?\n"
+            "(No builds with history as usual.)",
+            "OrganicFlowRibs",
+            adsk.core.MessageBoxButtonTypes.YesNoButtonType,
+            adsk.core.MessageBoxIconTypes.WarningIconType,
+        )
+        if answer != adsk.core.DialogResults.DialogYes:
+            report.set("bulk build", "skipped (timeline kept)")
+            yield
+            return
+
+    with report.phase("history capture off"):
+        design.designType = adsk.fusion.DesignTypes.DirectDesignType
+    try:
+        yield
+    finally:
+        with report.phase("history capture on"):
+            design.designType = adsk.fusion.DesignTypes.ParametricDesignType
+
+
+def read_params(inputs) -> dict:
+    """
+    Reads the MAIN, FLOW, QUALITY and TABS inputs into the keyword
+    arguments of geometry.generate_flow_ribs (shared by execute and the
+    preview), with the precedence between mode flags resolved.
+    """
+    # --- Read MAIN ---
+    rib_count = _int(inputs, "ribCount")
+    rib_length_in = _val_in(inputs, "ribLength")
+    rib_height_in = _val_in(inputs, "ribHeight")
+    rib_thickness_in = _val_in(inputs, "ribThickness")
+    gap_between_ribs_in = _val_in(inputs, "gapBetweenRibs")
+    layout_along_y = _bool(inputs, "layoutAlongY")
+    single_component = _bool(inputs, "singleComponent")
+
+    # --- Read FLOW ---
+    seed = _int(inputs, "seed")
+    randomness = _val_num(inputs, "randomness")
+    wildness = _val_num(inputs, "wildness")
+    smoothness = _val_num(inputs, "smoothness")
+
+    base_amplitude_in = _val_in(inputs, "baseAmplitude")
+    bend_scale_in = _val_in(inputs, "bendScale")
+    flow_angle_rad = float(inputs.itemById("flowAngleDeg").value)  # angle input: .value is already radians
+    flow_strength = _val_num(inputs, "flowStrength")
+    detail = _val_num(inputs, "detail")
+
+    use_mass = _bool(inputs, "useMass")
+    mass_strength = _val_num(inputs, "massStrength")
+
+    # --- Read QUALITY ---
+    samples = _int(inputs, "samples")
+    smooth_passes = _int(inputs, "smoothPasses")
+    parallel_profiles = _bool(inputs, "parallelProfiles")
+    adaptive_sampling = _bool(inputs, "adaptiveSampling")
+    sample_tolerance_in = _val_in(inputs, "sampleTolerance")
+    decimate_points = _bool(inputs, "decimatePoints")
+    nurbs_curves = _bool(inputs, "nurbsCurves")
+    nurbs_max_control_points = _int(inputs, "nurbsMaxControlPoints")
+    defer_sketch_compute = _bool(inputs, "deferSketchCompute")
+    brep_ribs = _bool(inputs, "brepRibs")
+    batch_sketch = _bool(inputs, "batchSketch")
+    dedupe_profiles = _bool(inputs, "dedupeProfiles")
+    mesh_bodies = _bool(inputs, "meshBodies")
+    pipeline_ribs = _bool(inputs, "pipelineRibs")
+
+    # --- Read TABS ---
+    add_tabs = _bool(inputs, "addTabs")
+    tab_width_in = _val_in(inputs, "tabWidth")
+    tab_height_in = _val_in(inputs, "tabHeight")
+    tab_centers_in = _parse_csv_floats(inputs.itemById("tabCenters").value)
+
+    # --- Mode precedence (decided here only; geometry takes the flags as given) ---
+    # Batch build: every rib in one sketch and extrude, so one component
+    single_component = single_component or batch_sketch
+    # Mesh bodies replace the other body builders, and skip the top curves
+    # and fit points they would use (whole stack as one mesh body in the
+    # single-component layout)
+    if mesh_bodies:
+        brep_ribs = batch_sketch = nurbs_curves = False
+        adaptive_sampling = decimate_points = False
+    # Streaming and profile reuse need one component per rib (as does the
+    # in-place update, in execute); streaming also needs a rib-by-rib build
+    # and computes its own profiles
+    pipeline_ribs = pipeline_ribs and not single_component and not mesh_bodies
+    dedupe_profiles = dedupe_profiles and not single_component
+    parallel_profiles = parallel_profiles and not pipeline_ribs
+
+    return dict(
+        seed=seed,
+
+        rib_count=rib_count,
+        rib_length_in=rib_length_in,
+        rib_height_in=rib_height_in,
+        rib_thickness_in=rib_thickness_in,
+        gap_between_ribs_in=gap_between_ribs_in,
+        layout_along_y=layout_along_y,
+
+        randomness=randomness,
+        wildness=wildness,
+        smoothness=smoothness,
+
+        base_amplitude_in=base_amplitude_in,
+        bend_scale_in=bend_scale_in,
+        flow_angle_rad=flow_angle_rad,
+        flow_strength=flow_strength,
+        detail=detail,
+
+        use_mass=use_mass,
+        mass_strength=mass_strength,
+
+        samples=samples,
+        smooth_passes=smooth_passes,
+        parallel_profiles=parallel_profiles,
+        adaptive_sampling=adaptive_sampling,
+        sample_tolerance_in=sample_tolerance_in,
+        decimate_points=decimate_points,
+        nurbs_curves=nurbs_curves,
+        nurbs_max_control_points=nurbs_max_control_points,
+        defer_sketch_compute=defer_sketch_compute,
+        brep_ribs=brep_ribs,
+        single_component=single_component,
+        batch_sketch=batch_sketch,
+        dedupe_profiles=dedupe_profiles,
+        mesh_bodies=mesh_bodies,
+        pipeline_ribs=pipeline_ribs,
+
+        add_tabs=add_tabs,
+        tab_width_in=tab_width_in,
+        tab_height_in=tab_height_in,
+        tab_centers_in=tab_centers_in,
+    )
+
+
 def execute(args):
     ui = None
+    progress = None
     try:
         app = adsk.core.Application.get()
         ui = app.userInterface
 
         cmd = args.command
         inputs = cmd.commandInputs
+        clear_preview()
 
-        # --- Read MAIN ---
-        rib_count = _int(inputs, "ribCount")
-        rib_length_in = _val_in(inputs, "ribLength")
-        rib_height_in = _val_in(inputs, "ribHeight")
-        rib_thickness_in = _val_in(inputs, "ribThickness")
-        gap_between_ribs_in = _val_in(inputs, "gapBetweenRibs")
-        layout_along_y = _bool(inputs, "layoutAlongY")
-
-        # --- Read FLOW ---
-        seed = _int(inputs, "seed")
-        randomness = _val_num(inputs, "randomness")
-        wildness = _val_num(inputs, "wildness")
-        smoothness = _val_num(inputs, "smoothness")
-
-        base_amplitude_in = _val_in(inputs, "baseAmplitude")
-        bend_scale_in = _val_in(inputs, "bendScale")
-        flow_angle_deg = float(inputs.itemById("flowAngleDeg").value)  # angle input (deg internal)
-        flow_strength = _val_num(inputs, "flowStrength")
-        detail = _val_num(inputs, "detail")
-
-        use_mass = _bool(inputs, "useMass")
-        mass_strength = _val_num(inputs, "massStrength")
-
-        # --- Read QUALITY ---
-        samples = _int(inputs, "samples")
-        smooth_passes = _int(inputs, "smoothPasses")
-
-        # --- Read TABS ---
-        add_tabs = _bool(inputs, "addTabs")
-        tab_width_in = _val_in(inputs, "tabWidth")
-        tab_height_in = _val_in(inputs, "tabHeight")
-        tab_centers_in = _parse_csv_floats(inputs.itemById("tabCenters").value)
+        rib_args = read_params(inputs)
 
         # --- Housekeeping ---
         delete_old = _bool(inputs, "deleteOld")
+        show_report = _bool(inputs, "showReport")
+        bulk_build = _bool(inputs, "bulkBuild")
+        incremental = _bool(inputs, "incremental")
+        keep_partial = _bool(inputs, "keepPartial")
+        report = RunReport()
 
         root = _get_root_component()
-        name_prefix = "OrganicFlowRibs_"
-        if delete_old:
-            delete_containers_with_prefix(root, name_prefix)
-            _delete_old_runs(root, name_prefix)
-        flow_angle_deg = float(inputs.itemById("flowAngleDeg").value)
-        flow_angle_rad = math.radians(flow_angle_deg)
-        
-
-        delete_containers_with_prefix(root, name_prefix)
-        
-        # Call into geometry.py
-
-        importlib.reload(geometry)
-
-        # IMPORTANT: your geometry.py needs to provide a function with this signature.
-        # If your function name differs, we'll adjust after you paste geometry.py.
-        geometry.generate_flow_ribs(
-            root=root,
-            name_prefix=name_prefix,
-
-            seed=seed,
-
-            rib_count=rib_count,
-            rib_length_in=rib_length_in,
-            rib_height_in=rib_height_in,
-            rib_thickness_in=rib_thickness_in,
-            gap_between_ribs_in=gap_between_ribs_in,
-            layout_along_y=layout_along_y,
-
-            randomness=randomness,
-            wildness=wildness,
-            smoothness=smoothness,
-
-            base_amplitude_in=base_amplitude_in,
-            bend_scale_in=bend_scale_in,
-            flow_angle_rad=flow_angle_rad,
-            flow_strength=flow_strength,
-            detail=detail,
-
-            use_mass=use_mass,
-            mass_strength=mass_strength,
-
-            samples=samples,
-            smooth_passes=smooth_passes,
-
-            add_tabs=add_tabs,
-            tab_width_in=tab_width_in,
-            tab_height_in=tab_height_in,
-            tab_centers_in=tab_centers_in
-        )
-
-        container_occ = root.occurrences.item(root.occurrences.count - 1)
-        container_comp = container_occ.component
-
-        backer.build_backer_panel(
-            container_comp,
-            rib_count=rib_count,
-            rib_length_in=rib_length_in,
-            rib_thickness_in=rib_thickness_in,
-            gap_between_ribs_in=gap_between_ribs_in,
-            layout_along_y=layout_along_y,
-            add_tabs=add_tabs,
-            tab_width_in=tab_width_in,
-            tab_height_in=tab_height_in,
-            tab_centers_in=tab_centers_in,
-            backer_thickness_in=0.75,
-            backer_tab_clearance_in=0.03,
-            backer_margin_in=2.0,
-        )
-
-        wall.build_wall(
-            container_comp,
-            wall_width_in=96.0,
-            wall_height_in=96.0,
-            wall_thickness_in=4.0,
-            mount_height_in=24.0,
-            wall_offset_in=-1.0,
-        )
+        progress = Progress(ui)
+        design = adsk.fusion.Design.cast(app.activeProduct)
+        with _history_capture_off(design, bulk_build, report):
+            name_prefix = "OrganicFlowRibs_"
+
+            # Incremental: update the previous run's container in place
+            # (per-component layout only) and clear any other runs
+            progress.begin("cleaning up")
+            with report.phase("cleanup"):
+                runs = _registered_runs(design, root, name_prefix)
+                update_occ = None
+                if incremental and not rib_args["single_component"] and runs:
+                    update_occ = runs[-1]
+                    runs = runs[:-1]
+                if update_occ is not None or delete_old:
+                    report.set("previous runs deleted", delete_entities(design, runs))
+            # Call into geometry.py
+            importlib.reload(geometry)
+
+            canceled = False
+            try:
+                container_occ = geometry.generate_flow_ribs(
+                    root=root,
+                    name_prefix=name_prefix,
+                    **rib_args,
+                    update_occ=update_occ,
+                    progress=progress,
+                    report=report,
+                )
+            except geometry.GenerationCanceled as e:
+                # Backer and wall are skipped. A run updated in place is
+                # always kept: its previous ribs are already gone.
+                canceled = True
+                keep = keep_partial or update_occ is not None
+                if not keep and e.container_occ is not None:
+                    with report.phase("cleanup"):
+                        delete_entities(design, [e.container_occ])
+                report.set("canceled", "partial result kept" if keep else "partial result deleted")
+
+            if not canceled:
+                container_comp = container_occ.component
+
+                # Backer and wall are kept when nothing they depend on changed
+                backer_args = dict(
+                    {k: rib_args[k] for k in _BACKER_KEYS},
+                    backer_thickness_in=0.75,
+                    backer_tab_clearance_in=0.03,
+                    backer_margin_in=2.0,
+                )
+                backer_fp = fingerprint(sorted(backer_args.items()))
+                if not _keep_child(container_comp, "BackerPanel", backer_fp):
+                    progress.begin("backer")
+                    with report.phase("backer"):
+                        occ = backer.build_backer_panel(
+                            container_comp,
+                            **backer_args,
+                            defer_sketch_compute=rib_args["defer_sketch_compute"],
+                            report=report,
+                        )
+                    if occ is not None:
+                        set_attr(occ, "fingerprint", backer_fp)
+
+                wall_args = dict(
+                    wall_width_in=96.0,
+                    wall_height_in=96.0,
+                    wall_thickness_in=4.0,
+                    mount_height_in=24.0,
+                    wall_offset_in=-1.0,
+                )
+                wall_fp = fingerprint(sorted(wall_args.items()))
+                if not _keep_child(container_comp, "Wall", wall_fp):
+                    progress.begin("wall")
+                    with report.phase("wall"):
+                        occ = wall.build_wall(container_comp, **wall_args)
+                    if occ is not None:
+                        set_attr(occ, "fingerprint", wall_fp)
+
+                params = fingerprint(sorted(rib_args.items()), backer_fp, wall_fp)
+                register_run(container_occ, name_prefix, new_run_id(), params)
+
+
+        # Per-rib cost of this mode vs the last run in the other mode
+        rib_count = rib_args["rib_count"]
+        mode = "bulk" if bulk_build else "parametric"
+        if not canceled:
+            _build_rates[mode] = sum(report.phases.values()) / max(1, rib_count)
+            if rib_args["mesh_bodies"]:
+                builder = "mesh"
+            else:
+                builder = "B-rep" if rib_args["brep_ribs"] else "sketch"
+            _body_rates[builder] = sum(report.phases.get(k, 0.0) for k in _RIB_PHASES) / max(1, rib_count)
+        if "mesh" in _body_rates and len(_body_rates) > 1:
+            report.set(
+                "rib bodies ms/rib (last runs)",
+                ", ".join(f"{k} {v * 1000.0:.1f}" for k, v in _body_rates.items())
+            )
+        if "bulk" in _build_rates and "parametric" in _build_rates:
+            bulk_ms = _build_rates["bulk"] * 1000.0
+            param_ms = _build_rates["parametric"] * 1000.0
+            saved = (_build_rates["parametric"] - _build_rates["bulk"]) * rib_count
+            report.set(
+                "bulk vs parametric (last runs)",
+                f"{bulk_ms:.0f} vs {param_ms:.0f} ms/rib, ~{saved:.1f} s saved at {rib_count} ribs"
+            )
+
+        progress.hide()
+        report.set("progress repaints", progress.repaints)
+
+        print(report.text(detail=True))
+        if show_report:
+            ui.messageBox(report.text(), "OrganicFlowRibs")
     except:
+        if progress is not None:
+            progress.hide()
         if ui:
             ui.messageBox("Generator failed:\n" + traceback.format_exc())
         print("Generator failed:\n", traceback.format_exc())
 
+def execute_preview(args):
+    """
+    Command preview: the whole sculpture as one custom-graphics mesh
+    (geometry.preview_mesh), or a few spline-only ribs
+    (geometry.preview_flow_ribs). Both draw only from profiles already
+    computed for the current inputs; otherwise they are queued in the
+    background and refresh_preview redraws once they land. isValidResult
+    stays False so OK still runs the full build, which reuses those profiles.
+    """
+    global _mesh_group
+    clear_preview()
+    inputs = args.command.commandInputs
+    if not _bool(inputs, "livePreview"):
+        return
+    d = config.DEFAULTS_PREVIEW
+    if _bool(inputs, "meshPreview"):
+        t0 = time.perf_counter()
+        _mesh_group, tris = geometry.preview_mesh(
+            _get_root_component(),
+            points=d["mesh_points"],
+            **read_params(inputs),
+        )
+        if _mesh_group is None:
+            print("OrganicFlowRibs mesh preview: profiles pending")
+        else:
+            adsk.core.Application.get().activeViewport.refresh()
+            print(f"OrganicFlowRibs mesh preview: {tris} triangles, {(time.perf_counter() - t0) * 1000.0:.0f} ms")
+        args.isValidResult = False
+        return
+    drawn = geometry.preview_flow_ribs(
+        _get_root_component(),
+        max_ribs=d["max_ribs"],
+        points=d["points"],
+        budget_s=d["budget_s"],
+        **read_params(inputs),
+    )
+    print(f"OrganicFlowRibs preview: {drawn} ribs" if drawn else "OrganicFlowRibs preview: profiles pending")
+    args.isValidResult = False
+
+
+def refresh_preview(command):
+    """
+    Redraws the command preview after background profiles were published
+    (custom event, so this runs on Fusion's main thread).
+    """
+    if _bool(command.commandInputs, "livePreview"):
+        command.doExecutePreview()
+
+
+def on_profiles_ready(callback):
+    """
+    Sets the callback PRECOMPUTE runs from its worker thread after each
+    publish (None to clear). It must be thread-safe, e.g. fireCustomEvent.
+    """
+    PRECOMPUTE.on_published = callback
+
+
+def precompute_profiles(inputs):
+    """
+    Queues background profile computation for the current inputs
+    (debounced; inputs that don't change the profiles are no-ops).
+    """
+    PRECOMPUTE.submit(geometry.rib_profile_params(read_params(inputs)))
+
+
+def clear_preview():
+    """Deletes the custom-graphics mesh preview, if one is showing."""
+    global _mesh_group
+    if _mesh_group is not None:
+        try:
+            if _mesh_group.isValid:
+                _mesh_group.deleteMe()
+        except:
+            pass
+        _mesh_group = None
+
+
+def _registered_runs(design, root, prefix: str):
+    """
+    Previous run containers, oldest first, from the attribute registry.
+    Designs generated before the registry existed get one name-prefix scan;
+    the root component is then marked so later runs skip it.
+    """
+    runs = find_runs(design, prefix)
+    if get_attr(root, "registry") is None:
+        tagged = {o.entityToken for o in runs}
+        legacy = [
+            o for o in root.occurrences
+            if o.component.name.startswith(prefix) and o.entityToken not in tagged
+        ]
+        runs = legacy + runs
+        set_attr(root, "registry", 1)
+    return runs
+
+
+def _keep_child(container_comp, name: str, fp: str) -> bool:
+    """
+    True if container_comp already has a `name` occurrence built with
+    fingerprint fp. Otherwise any stale `name` occurrences are deleted.
+    """
+    found = [o for o in container_comp.occurrences if o.component.name == name]
+    keep = next((o for o in found if get_attr(o, "fingerprint") == fp), None)
+    for o in found:
+        if o is not keep:
+            o.deleteMe()
+    return keep is not None
+
+
 def _get_root_component() -> adsk.fusion.Component:
     app = adsk.core.Application.get()
     design = adsk.fusion.Design.cast(app.activeProduct)
@@ -19,9 +19,25 @@
 import adsk.core
 import adsk.fusion
 import math
-import random
+import time
 
+from flow_core import bspline
+from flow_core import dedupe
+from flow_core import mesh
+from flow_core import outline
+from flow_core import parallel
+from flow_core import pipeline
+from flow_core import precompute
+from flow_core import profiles
+from flow_core import sampling
+from flow_core import simplify
+from flow_core import surface
+from flow_core.report import RunReport
+from progress import Progress
+from rib_brep import brep
 from util import cm
+from util import get_attr
+from util import set_attr
 
 # Keep this TRUE to match the legacy look.
 LEGACY_POINT_QUIRK = True
@@ -36,6 +52,890 @@ ORIENT2_AXIS = 'Z'  # optional
 ORIENT2_DEG  = 0    # set to 180 to flip, etc
 
 
+class GenerationCanceled(Exception):
+    """
+    The progress dialog's Cancel was pressed. Ribs are checked between
+    builds, so everything before ribs_done is complete; container_occ is the
+    (partial) run container.
+    """
+    def __init__(self, ribs_done: int, container_occ=None):
+        super().__init__(f"Canceled after {ribs_done} ribs")
+        self.ribs_done = ribs_done
+        self.container_occ = container_occ
+
+
+def _stack_matrix(i: int, pitch_in: float, layout_along_y: bool) -> adsk.core.Matrix3D:
+    """Legacy stack translation of rib i (before the orientation turn)."""
+    m = adsk.core.Matrix3D.create()
+    if layout_along_y:
+        m.translation = adsk.core.Vector3D.create(0, cm(i * pitch_in), 0)
+    else:
+        m.translation = adsk.core.Vector3D.create(cm(i * pitch_in), 0, 0)
+    return m
+
+
+def _rib_transform(i: int, pitch_in: float, layout_along_y: bool, mirror=None) -> adsk.core.Matrix3D:
+    """
+    Final placement of rib i in one matrix: the legacy stack translation
+    followed by the in-place orientation turn about the rib's own pivot.
+    mirror (a _mirror_matrix) is applied first, for a rib that reuses
+    another rib's component end to end.
+    """
+    m = _stack_matrix(i, pitch_in, layout_along_y)
+    t = m.translation
+    rot = adsk.core.Matrix3D.create()
+    rot.setToRotation(
+        ORIENT_SIGN * (math.pi / 2),
+        adsk.core.Vector3D.create(0, 1, 0),
+        adsk.core.Point3D.create(t.x, t.y, t.z)
+    )
+    m.transformBy(rot)
+    if mirror is None:
+        return m
+    out = mirror.copy()
+    out.transformBy(m)
+    return out
+
+
+def _mirror_matrix(length_in: float, thickness_in: float) -> adsk.core.Matrix3D:
+    """
+    Half turn of a rib-local component about the vertical axis through the
+    rib's center: x -> length - x, y -> thickness - y. The rib outline is
+    reversed end to end and the slab stays where it was.
+    """
+    m = adsk.core.Matrix3D.create()
+    m.setToRotation(
+        math.pi,
+        adsk.core.Vector3D.create(0, 0, 1),
+        adsk.core.Point3D.create(cm(length_in / 2.0), cm(thickness_in / 2.0), 0)
+    )
+    return m
+
+
+def _tabs_symmetric(tab_spans, length_in: float) -> bool:
+    """Whether the tab layout is its own mirror image along the rib."""
+    mirrored = sorted((length_in - x1, length_in - x0) for x0, x1 in tab_spans)
+    return all(
+        abs(a0 - b0) < 1e-9 and abs(a1 - b1) < 1e-9
+        for (a0, a1), (b0, b1) in zip(sorted(tab_spans), mirrored)
+    )
+
+
+def _mesh_placement(rib_count: int, pitch_in: float, layout_along_y: bool):
+    """
+    _rib_transform as flow_core.mesh wants it: rib i is R @ local + offset_i,
+    so (R as nested rows, per-rib stack offsets in inches).
+    """
+    rot = _rib_transform(0, pitch_in, layout_along_y)
+    rotation = [[rot.getCell(r, c) for c in range(3)] for r in range(3)]
+    offsets = [
+        (0.0, k * pitch_in, 0.0) if layout_along_y else (k * pitch_in, 0.0, 0.0)
+        for k in range(rib_count)
+    ]
+    return rotation, offsets
+
+
+def _report_reuse(report, canonical):
+    """Run report lines for dedupe.canonical_ribs results."""
+    reused = [r for i, (src, r) in enumerate(canonical) if src != i]
+    report.set("ribs reused (identical profile)", len(reused))
+    if any(reused):
+        report.set("ribs reused reversed (mirrored)", sum(reused))
+
+
+def _tag_rib(occ, i: int, fingerprint: str, layout_sig: str, tab_height_in: float):
+    """
+    Attributes an incremental run uses to recognise this rib. Call only once
+    the rib is built and in its final placement: the layout signature
+    vouches for the occurrence transform.
+    """
+    set_attr(occ, "rib_index", i)
+    set_attr(occ, "fingerprint", fingerprint)
+    set_attr(occ, "layout", layout_sig)
+    set_attr(occ, "tab_height", tab_height_in)
+
+
+def _retab_rib(comp, old_h_in: float, new_h_in: float) -> bool:
+    """
+    Moves the tab bottoms of a sketch-built rib from -old_h_in to -new_h_in
+    in place; the extrude follows on recompute (parametric designs only).
+    Returns False if comp doesn't hold exactly one rib sketch.
+    """
+    if comp.sketches.count != 1:
+        return False
+    sk = comp.sketches.item(0)
+    old_y = cm(-old_h_in)
+    # Line endpoints are separate (coincident) sketch points: move each one
+    # sitting on the old tab bottom
+    tol = 1e-6
+    shift = adsk.core.Vector3D.create(0, cm(-(new_h_in - old_h_in)), 0)
+    sk.isComputeDeferred = True
+    try:
+        for pt in [p for p in sk.sketchPoints if abs(p.geometry.y - old_y) < tol]:
+            pt.move(shift)
+    finally:
+        sk.isComputeDeferred = False
+    return True
+
+
+def _draw_rib(sk, outline_pts, fit=None, fit_xz=None, dy_in: float = 0.0):
+    """
+    Adds one closed rib outline to sk: the top curve (fixed NURBS from a
+    CurveFit, or a fitted spline through fit_xz points) plus the straight
+    closing lines. dy_in shifts the whole outline along sketch y.
+
+    Legacy coordinate quirk: points are emitted as (x, z, 0).
+    """
+    def P(xi, zi):
+        return adsk.core.Point3D.create(cm(xi), cm(zi + dy_in), 0)
+
+    curves = sk.sketchCurves
+    if fit is not None:
+        ctrl = [P(x_in, z_in) for x_in, z_in in zip(fit.ctrl_xs, fit.ctrl_zs)]
+        nurbs = adsk.core.NurbsCurve3D.createNonRational(ctrl, fit.degree, fit.knots, False)
+        curves.sketchFixedSplines.addByNurbsCurve(nurbs)
+    else:
+        fitPts = adsk.core.ObjectCollection.create()
+        for x_in, z_in in fit_xz:
+            fitPts.add(P(x_in, z_in))
+        curves.sketchFittedSplines.add(fitPts)
+
+    lines = curves.sketchLines
+    for (xa, za), (xb, zb) in zip(outline_pts, outline_pts[1:]):
+        lines.addByTwoPoints(P(xa, za), P(xb, zb))
+
+
+def _move_bitwise(comp, bodies, first, d) -> int:
+    """
+    Moves bodies[i] (None entries skipped) by `first` and then by i * d.
+    Returns the number of move features added.
+
+    A move feature applies one transform to all of its bodies, but every
+    rib needs its own. Rib i's placement is the same rotation R for all
+    ribs plus a translation i * d, so after one move by R, bit b of i is
+    applied by moving every body with that bit set by 2**b * d:
+    1 + ceil(log2(ribs)) moves instead of one per rib.
+    """
+    moves = comp.features.moveFeatures
+
+    def move(targets, m):
+        coll = adsk.core.ObjectCollection.create()
+        for body in targets:
+            coll.add(body)
+        mi = moves.createInput2(coll)
+        mi.defineAsFreeMove(m)
+        moves.add(mi)
+
+    placed = [b for b in bodies if b is not None]
+    if not placed:
+        return 0
+    move(placed, first)
+    move_count = 1
+    bit = 0
+    while (1 << bit) < len(bodies):
+        targets = [b for i, b in enumerate(bodies) if b is not None and (i >> bit) & 1]
+        if targets:
+            step = d.copy()
+            step.scaleBy(float(1 << bit))
+            m = adsk.core.Matrix3D.create()
+            m.translation = step
+            move(targets, m)
+            move_count += 1
+        bit += 1
+    return move_count
+
+
+def _build_ribs_batch(
+    comp,
+    rib_profiles,
+    rib_top,
+    tab_spans,
+    *,
+    rib_length_in: float,
+    rib_height_in: float,
+    rib_thickness_in: float,
+    tab_height_in: float,
+    pitch_in: float,
+    layout_along_y: bool,
+    progress,
+    report,
+):
+    """
+    Batch build: every rib outline in ONE sketch (rib i shifted i * slot
+    along sketch y), ONE extrude of all profiles, then a handful of move
+    features (_move_bitwise) to put each body in its layout slot. Rib i's
+    placement is the usual one plus undoing its sketch slot, still a shared
+    rotation plus a translation linear in i.
+
+    Returns (sketch seconds, extrude seconds, placement seconds).
+    """
+    rib_count = rib_profiles.rib_count
+    slot_in = rib_height_in + tab_height_in + 1.0
+
+    t0 = time.perf_counter()
+    sk = comp.sketches.add(comp.xZConstructionPlane)
+    sk.isComputeDeferred = True
+    progress.begin("sketching", rib_count)
+    for i in range(rib_count):
+        if progress.step(i):
+            sk.isComputeDeferred = False
+            raise GenerationCanceled(i)
+        heights = rib_profiles.heights[i]
+        outline_pts = outline.closing_outline(rib_length_in, heights[-1], heights[0], tab_spans, tab_height_in)
+        _draw_rib(sk, outline_pts, *rib_top(i), dy_in=i * slot_in)
+    sk.isComputeDeferred = False
+
+    profs = adsk.core.ObjectCollection.create()
+    for k in range(sk.profiles.count):
+        profs.add(sk.profiles.item(k))
+    t_sketch = time.perf_counter() - t0
+    if profs.count != rib_count:
+        adsk.core.Application.get().userInterface.messageBox(
+            f"Batch build found {profs.count} profiles for {rib_count} ribs. "
+            "Try lowering amplitude or tab height, or turn batch build off."
+        )
+        return t_sketch, 0.0, 0.0
+
+    # Extrude thickness along +Y (legacy behavior), all ribs at once
+    progress.begin("extruding")
+    t0 = time.perf_counter()
+    ext = comp.features.extrudeFeatures
+    ei = ext.createInput(profs, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+    ei.setDistanceExtent(False, adsk.core.ValueInput.createByString(f"{rib_thickness_in} in"))
+    feat = ext.add(ei)
+    t_extrude = time.perf_counter() - t0
+
+    # Match bodies to ribs by which sketch slot their center falls in
+    progress.begin("placing")
+    t0 = time.perf_counter()
+    bodies = [None] * rib_count
+    for k in range(feat.bodies.count):
+        body = feat.bodies.item(k)
+        box = body.boundingBox
+        center = adsk.core.Point3D.create(
+            0.5 * (box.minPoint.x + box.maxPoint.x),
+            0.5 * (box.minPoint.y + box.maxPoint.y),
+            0.5 * (box.minPoint.z + box.maxPoint.z),
+        )
+        y_in = sk.modelToSketchSpace(center).y / 2.54
+        i = int(math.floor((y_in + tab_height_in + 0.5) / slot_in))
+        if 0 <= i < rib_count and bodies[i] is None:
+            body.name = f"Rib_{i+1:02d}"
+            bodies[i] = body
+
+    # Rib i: undo its sketch slot, then the usual placement
+    rot = _rib_transform(0, pitch_in, layout_along_y)
+    slot = adsk.core.Vector3D.create(0, cm(slot_in), 0)
+    slot.transformBy(sk.transform)
+    one = adsk.core.Matrix3D.create()
+    one.translation = adsk.core.Vector3D.create(-slot.x, -slot.y, -slot.z)
+    one.transformBy(_rib_transform(1, pitch_in, layout_along_y))
+    d = one.translation
+    d.subtract(rot.translation)
+
+    report.set("rib body moves", _move_bitwise(comp, bodies, rot, d))
+    placed = [b for b in bodies if b is not None]
+    if len(placed) != rib_count:
+        report.set("batch ribs not matched to a slot", rib_count - len(placed))
+    return t_sketch, t_extrude, time.perf_counter() - t0
+
+
+class _RibRun:
+    """
+    One generate_flow_ribs run: the run container, the rib profiles and top
+    curves (computed up front, or streamed in during the rib loop), the
+    reuse and in-place update tables, and the single-component bodies
+    waiting to be placed. Each build_* method commits every rib in one
+    strategy; the _*_rib methods build one rib's body.
+    """
+
+    def __init__(
+        self,
+        root,
+        name_prefix: str,
+        p: dict,
+        *,
+        rib_thickness_in: float,
+        layout_along_y: bool,
+        parallel_profiles: bool,
+        adaptive_sampling: bool,
+        sample_tolerance_in: float,
+        decimate_points: bool,
+        nurbs_curves: bool,
+        nurbs_max_control_points: int,
+        defer_sketch_compute: bool,
+        brep_ribs: bool,
+        single_component: bool,
+        dedupe_profiles: bool,
+        mesh_bodies: bool,
+        pipeline_ribs: bool,
+        tab_spans,
+        tab_height_in: float,
+        update_occ,
+        progress,
+        report,
+        ui,
+    ):
+        self.p = p
+        self.rib_count = p["rib_count"]
+        self.rib_length_in = p["rib_length_in"]
+        self.rib_height_in = p["rib_height_in"]
+        self.pitch_in = p["rib_pitch_in"]
+        self.rib_thickness_in = rib_thickness_in
+        self.layout_along_y = layout_along_y
+        self.tol = sample_tolerance_in
+        self.brep_ribs = brep_ribs
+        self.mesh_bodies = mesh_bodies
+        self.single_component = single_component
+        self.defer_sketch_compute = defer_sketch_compute
+        self.tab_spans = tab_spans
+        self.tab_height_in = tab_height_in
+        self.progress = progress
+        self.report = report
+        self.ui = ui
+
+        self.t_sketch = 0.0
+        self.t_extrude = 0.0
+        self.t_brep = 0.0
+        self.t_mesh = 0.0
+        self.t_buffers = 0.0
+        self.t_place = 0.0
+
+        self._open_container(root, name_prefix, p["seed"], update_occ)
+        self._compute_curves(
+            parallel_profiles, adaptive_sampling, decimate_points,
+            nurbs_curves, nurbs_max_control_points, pipeline_ribs,
+        )
+        self.t_ribs = time.perf_counter()
+        self._plan_reuse(
+            dedupe_profiles,
+            (
+                self.rib_length_in, rib_thickness_in, tab_spans,
+                nurbs_curves, brep_ribs, mesh_bodies, sample_tolerance_in, nurbs_max_control_points,
+                adaptive_sampling, decimate_points,
+            ),
+            root,
+        )
+        self.mesh_ribs = None
+        if mesh_bodies:
+            self._mesh_buffers()
+
+    # ---- setup ----
+
+    def _open_container(self, root, name_prefix, seed, update_occ):
+        """Run container, the previous run's ribs by index, and the "Ribs" component."""
+        rib_count = self.rib_count
+
+        # Container component (an incremental run updates the previous one)
+        if update_occ is not None:
+            self.container_occ = update_occ
+        else:
+            self.container_occ = root.occurrences.addNewComponent(adsk.core.Matrix3D.create())
+            set_attr(self.container_occ, "container", name_prefix)
+        container_comp = self.container_occ.component
+        container_comp.name = f"{name_prefix}{rib_count}x_seed{seed}"
+        self.occs = occs = container_comp.occurrences
+        self.occ_by_rib = {}  # rib index -> its occurrence (new or kept)
+
+        # Ribs left by the previous run, by index. Anything else except the
+        # backer and wall (e.g. a single-component "Ribs") is out of date.
+        self.old_ribs = {}
+        if update_occ is not None:
+            stale = []
+            for k in range(occs.count):
+                o = occs.item(k)
+                idx = get_attr(o, "rib_index")
+                if idx is not None and int(idx) < rib_count:
+                    self.old_ribs[int(idx)] = o
+                elif o.component.name not in ("BackerPanel", "Wall"):
+                    stale.append(o)
+            for o in stale:
+                o.deleteMe()
+
+        # Single-component layout: every rib is a named body in one "Ribs"
+        # component, placed by body transforms computed up front
+        self.ribs_comp = None
+        self.rib_transforms = []
+        if self.single_component:
+            ribs_occ = occs.addNewComponent(adsk.core.Matrix3D.create())
+            self.ribs_comp = ribs_occ.component
+            self.ribs_comp.name = "Ribs"
+            self.rib_transforms = [
+                _rib_transform(i, self.pitch_in, self.layout_along_y) for i in range(rib_count)
+            ]
+        self.placed_bodies = []   # (name, transient B-rep body), added in one batch
+        self.moved_bodies = {}    # rib index -> feature body, moved after the loop
+
+    def _compute_curves(
+        self, parallel_profiles, adaptive_sampling, decimate_points,
+        nurbs_curves, nurbs_max_control_points, pipeline_ribs,
+    ):
+        """
+        Profiles plus, per rib, its curve fit (NURBS / B-rep) or fit-point
+        indices: all up front, or (pipeline_ribs) a RibStream that delivers
+        them a chunk of ribs at a time while the rib loop commits earlier ribs.
+        """
+        p, report, progress, tol = self.p, self.report, self.progress, self.tol
+        rib_count = self.rib_count
+        fit_curves = nurbs_curves or self.brep_ribs
+        # B-rep top curves must meet the tolerance, so their control ladder
+        # isn't capped by the NURBS-curve setting
+        fit_max_ctrl = None if self.brep_ribs else nurbs_max_control_points
+        self.stream = None
+        self.held = None
+
+        if pipeline_ribs:
+            def rib_work(chunk):
+                """Worker side: (profile key, curve fit, fit rows, candidates) per rib."""
+                keys = [dedupe.profile_key(row, tol) for row in chunk.heights]
+                if fit_curves:
+                    fits = bspline.fit_profiles(chunk, tol, fit_max_ctrl)
+                    return [(k, fit, None, len(chunk.xs)) for k, fit in zip(keys, fits)]
+                if adaptive_sampling:
+                    cands = sampling.adaptive_rows(chunk, tol)
+                else:
+                    cands = [range(len(chunk.xs))] * chunk.rib_count
+                rows = simplify.decimate_rows(chunk, tol, cands) if decimate_points else cands
+                return [(k, None, r, len(c)) for k, r, c in zip(keys, rows, cands)]
+
+            progress.begin("computing profiles")
+            waited = precompute.PRECOMPUTE.wait(p)
+            self.held = profiles.remembered(p)
+            if self.held is not None:
+                report.set("profiles", "precomputed in background" if waited else "reused (preview / last run)")
+            self.stream = pipeline.RibStream(p, rib_work, held=self.held)
+            self.xs = self.held.xs if self.held is not None else profiles.sample_xs(p)
+            self.rib_profiles = profiles.RibProfiles(self.xs, [None] * rib_count)
+            self.curve_fits = [None] * rib_count if fit_curves else None
+            self.fit_rows = [None] * rib_count
+            if fit_curves:
+                report.points_label = "control points"
+                report.rib_tolerance = tol
+            return
+
+        progress.begin("computing profiles")
+        def compute():
+            if parallel_profiles:
+                return parallel.compute_profiles_parallel(p)
+            prof = profiles.compute_profiles(p)
+            report.set("term cache (session)", surface.CACHE.summary())
+            return prof
+
+        with report.phase("profiles"):
+            # A background job for exactly these inputs is finished first
+            # rather than started over
+            waited = precompute.PRECOMPUTE.wait(p)
+            self.rib_profiles, reused = profiles.reuse_profiles(p, compute)
+        if reused:
+            report.set("profiles", "precomputed in background" if waited else "reused (preview / last run)")
+
+        self.xs = xs = self.rib_profiles.xs
+        self.curve_fits = None
+        self.fit_rows = None
+        if fit_curves:
+            # Least-squares B-spline per rib, created from its control points
+            # (B-rep ribs always use these as their top curve)
+            progress.begin("fitting curves")
+            with report.phase("curve fit"):
+                self.curve_fits = bspline.fit_profiles(self.rib_profiles, tol, fit_max_ctrl)
+            report.points_label = "control points"
+            report.rib_tolerance = tol
+            report.rib_points = [(len(xs), len(f.ctrl_zs)) for f in self.curve_fits]
+            report.rib_deviation = [f.max_dev for f in self.curve_fits]
+        else:
+            # Fit points per rib: sample grid (or its adaptive subset), then
+            # optionally decimated before anything is sent to Fusion
+            with report.phase("fit points"):
+                if adaptive_sampling:
+                    candidates = sampling.adaptive_rows(self.rib_profiles, tol)
+                else:
+                    candidates = [range(len(xs))] * rib_count
+
+                if decimate_points:
+                    self.fit_rows = simplify.decimate_rows(self.rib_profiles, tol, candidates)
+                else:
+                    self.fit_rows = candidates
+            report.rib_points = [(len(c), len(f)) for c, f in zip(candidates, self.fit_rows)]
+
+    def _plan_reuse(self, dedupe_profiles, rib_sig, root):
+        """
+        Profile reuse (canonical ribs) and the fingerprints an incremental
+        run compares; per-rib component layout only.
+        """
+        rib_count, tol, report = self.rib_count, self.tol, self.report
+
+        # Ribs whose profiles match within tolerance share one component
+        # (bodies in one component can't be instanced). Reversed matches are
+        # placed with a half turn, which needs a tab layout that is its own
+        # mirror image.
+        self.canonical = None    # rib -> (source rib, reversed)
+        self.profile_index = None
+        self.mirror = _mirror_matrix(self.rib_length_in, self.rib_thickness_in)
+        mirror_ok = _tabs_symmetric(self.tab_spans, self.rib_length_in)
+        if dedupe_profiles and self.stream is not None:
+            self.canonical = [None] * rib_count  # filled as ribs arrive
+            self.profile_index = dedupe.ProfileIndex(tol, mirror_ok)
+        elif dedupe_profiles:
+            with report.phase("profile dedupe"):
+                self.canonical = dedupe.canonical_ribs(self.rib_profiles, tol, mirror_ok)
+            _report_reuse(report, self.canonical)
+
+        # Per-rib fingerprints (quantized profile + everything that shapes the
+        # body) and the layout signature, stored on each rib occurrence so the
+        # next incremental run can tell which ribs changed
+        self.rib_sig = rib_sig
+        self.fingerprints = []
+        self.layout_sig = ""
+        if not self.single_component:
+            if self.stream is not None:
+                self.fingerprints = [None] * rib_count  # filled as ribs arrive
+            else:
+                self.fingerprints = [
+                    dedupe.fingerprint(dedupe.profile_key(row, tol), rib_sig)
+                    for row in self.rib_profiles.heights
+                ]
+            self.layout_sig = dedupe.fingerprint(self.pitch_in, self.layout_along_y, ORIENT_SIGN)
+        # Tab height is kept out of the fingerprint: a sketch-built rib whose
+        # only change is tab height gets its tab bottoms moved instead of a rebuild
+        self.rib_tab_h = self.tab_height_in if self.tab_spans else 0.0
+        self.can_retab = (
+            bool(self.tab_spans) and self.rib_tab_h > 0.0
+            and root.parentDesign.designType == adsk.fusion.DesignTypes.ParametricDesignType
+        )
+        self.retabbed = set()
+
+    def _mesh_buffers(self):
+        """
+        Mesh bodies (render-only runs): closed triangle meshes of every rib,
+        built in bulk from the height grid at full sample resolution. One
+        body for the whole stack in single-component layouts, else one per
+        rib in its own (rib-local) frame. Tabs aren't meshed.
+        """
+        rib_count = self.rib_count
+        t_step = time.perf_counter()
+        if self.single_component:
+            rotation, offsets = _mesh_placement(rib_count, self.pitch_in, self.layout_along_y)
+        else:
+            rotation = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))
+            offsets = [(0.0, 0.0, 0.0)] * rib_count
+        self.mesh_coords, self.mesh_indices = mesh.heightfield_mesh(
+            self.xs, self.rib_profiles.heights, range(len(self.xs)), self.rib_thickness_in,
+            rotation, offsets, closed=True
+        )
+        self.t_buffers = time.perf_counter() - t_step
+        self.report.add_time("mesh buffers", self.t_buffers)
+        self.report.set("mesh triangles", len(self.mesh_indices) // 3)
+        if not self.single_component:
+            self.mesh_ribs = mesh.rib_slices(self.mesh_coords, self.mesh_indices, rib_count)
+
+    # ---- per-rib data ----
+
+    def _take_rib(self, i):
+        """Streamed build: receives rib i and fills the per-rib tables."""
+        progress, report = self.progress, self.report
+
+        def idle():
+            if progress.step(i):
+                raise GenerationCanceled(i)
+
+        row, (key, fit, rows, n_cand) = self.stream.rib(i, idle)
+        self.rib_profiles.heights[i] = row
+        if self.curve_fits is not None:
+            self.curve_fits[i] = fit
+            report.rib_points.append((n_cand, len(fit.ctrl_zs)))
+            report.rib_deviation.append(fit.max_dev)
+        else:
+            self.fit_rows[i] = rows
+            report.rib_points.append((n_cand, len(rows)))
+        if self.canonical is not None:
+            self.canonical[i] = self.profile_index.match(i, row)
+        if self.fingerprints:
+            self.fingerprints[i] = dedupe.fingerprint(key, self.rib_sig)
+
+    def rib_fit_ok(self, i):
+        """NURBS / B-rep ribs: whether rib i's curve fit is within tolerance."""
+        return self.curve_fits[i].max_dev <= self.tol
+
+    def rib_top(self, i):
+        """Top curve of rib i for _draw_rib: (CurveFit, None) or (None, fit points)."""
+        xs = self.xs
+        heights = self.rib_profiles.heights[i]
+        if self.curve_fits is None:
+            return None, [(xs[s], heights[s]) for s in self.fit_rows[i]]
+        if self.rib_fit_ok(i):
+            return self.curve_fits[i], None
+        # Curve fit missed the tolerance at the control-point cap (flagged in
+        # the report): fitted spline through every sample instead
+        return None, [(xs[s], heights[s]) for s in range(len(xs))]
+
+    def rib_outline(self, i):
+        """Straight closing segments of rib i (with optional tabs to negative z)."""
+        heights = self.rib_profiles.heights[i]
+        return outline.closing_outline(
+            self.rib_length_in, heights[-1], heights[0], self.tab_spans, self.tab_height_in
+        )
+
+    # ---- placement ----
+
+    def place_bodies(self) -> float:
+        """
+        Single-component layout: adds and moves the bodies built so far into
+        their final placement (also for a canceled run's partial stack).
+        Returns seconds spent.
+        """
+        t0 = time.perf_counter()
+        if self.placed_bodies:
+            brep.add_bodies(
+                self.ribs_comp, [b for _, b in self.placed_bodies], [n for n, _ in self.placed_bodies]
+            )
+        if self.moved_bodies:
+            # Rib i's transform is rib 0's plus i times the stack step
+            first = self.rib_transforms[0]
+            d = (self.rib_transforms[1] if self.rib_count > 1 else first).translation
+            d.subtract(first.translation)
+            bodies = [self.moved_bodies.get(i) for i in range(max(self.moved_bodies) + 1)]
+            self.report.set("rib body moves", _move_bitwise(self.ribs_comp, bodies, first, d))
+        del self.placed_bodies[:]
+        self.moved_bodies.clear()
+        return time.perf_counter() - t0
+
+    # ---- builders ----
+
+    def build_mesh_stack(self):
+        """Mesh bodies, single-component layout: the whole stack as one mesh body."""
+        self.progress.begin("meshing")
+        t_step = time.perf_counter()
+        self.ribs_comp.meshBodies.addByTriangleMeshData(
+            self.mesh_coords, self.mesh_indices, [], []
+        ).name = "Ribs"
+        self.t_mesh = time.perf_counter() - t_step
+
+    def build_batch(self):
+        """Batch build: one sketch and one extrude for the stack (_build_ribs_batch)."""
+        self.t_sketch, self.t_extrude, self.t_place = _build_ribs_batch(
+            self.ribs_comp, self.rib_profiles, self.rib_top, self.tab_spans,
+            rib_length_in=self.rib_length_in,
+            rib_height_in=self.rib_height_in,
+            rib_thickness_in=self.rib_thickness_in,
+            tab_height_in=self.rib_tab_h,
+            pitch_in=self.pitch_in,
+            layout_along_y=self.layout_along_y,
+            progress=self.progress,
+            report=self.report,
+        )
+
+    def build_per_rib(self):
+        """
+        Rib by rib: a component per rib (or a body in "Ribs"), built as a
+        mesh, B-rep or sketch + extrude body, with kept ribs and reused
+        profiles skipped. Placed as it goes, so a canceled run leaves every
+        built rib in place.
+        """
+        progress, report = self.progress, self.report
+        progress.begin("building ribs", self.rib_count)
+        for i in range(self.rib_count):
+            if progress.step(i):
+                raise GenerationCanceled(i)
+            if self.stream is not None:
+                self._take_rib(i)
+
+            rib_name = f"Rib_{i+1:02d}"
+            if self._keep_old_rib(i):
+                continue
+
+            rib_occ = None
+            if self.single_component:
+                rib_comp = self.ribs_comp
+            elif self.canonical is not None and self.canonical[i][0] != i:
+                self._add_instance(i)
+                continue
+            else:
+                rib_occ = self.occs.addNewComponent(adsk.core.Matrix3D.create())
+                self.occ_by_rib[i] = rib_occ
+                rib_comp = rib_occ.component
+                rib_comp.name = rib_name
+
+            outline_pts = self.rib_outline(i)
+            if self.mesh_ribs is not None:
+                self._mesh_rib(i, rib_comp)
+                builder = "mesh"
+            else:
+                builder = "brep"
+                if not (self.brep_ribs and self._brep_rib(i, rib_comp, rib_name, outline_pts)):
+                    builder = "sketch"
+                    if not self._sketch_rib(i, rib_comp, rib_name, outline_pts):
+                        self.ui.messageBox(f"Profile failed on rib {i+1}. Try lowering amplitude or tab height.")
+                        if self.single_component:
+                            self.t_place += self.place_bodies()
+                        return
+
+            if self.single_component:
+                continue
+            set_attr(rib_occ, "builder", builder)
+
+            # Final placement right away (legacy stack translation plus the
+            # orientation turn), so a canceled run leaves every built rib placed
+            rib_occ.transform = _rib_transform(i, self.pitch_in, self.layout_along_y)
+            _tag_rib(rib_occ, i, self.fingerprints[i], self.layout_sig, self.rib_tab_h)
+
+        if self.stream is not None:
+            if self.canonical is not None:
+                _report_reuse(report, self.canonical)
+            if self.held is None:
+                profiles.remember_profiles(self.p, self.rib_profiles)
+
+        if self.single_component:
+            progress.begin("placing")
+            self.t_place += self.place_bodies()
+
+    def _keep_old_rib(self, i) -> bool:
+        """
+        Incremental run: keeps the previous run's rib i if its fingerprint
+        matches (re-tabbing or re-placing it as needed), else deletes it.
+        True if kept.
+        """
+        report = self.report
+        old = self.old_ribs.pop(i, None)
+        if old is not None and get_attr(old, "fingerprint") == self.fingerprints[i]:
+            old_tab_h = float(get_attr(old, "tab_height") or 0.0)
+            keep = abs(old_tab_h - self.rib_tab_h) < 1e-9
+            if not keep and self.can_retab and old_tab_h > 0.0 and get_attr(old, "builder") == "sketch":
+                # Shared (deduped) components are moved once
+                token = old.component.entityToken
+                keep = token in self.retabbed or _retab_rib(old.component, old_tab_h, self.rib_tab_h)
+                if keep:
+                    if token not in self.retabbed:
+                        report.add("ribs re-tabbed")
+                    self.retabbed.add(token)
+                    set_attr(old, "tab_height", self.rib_tab_h)
+        else:
+            keep = False
+        if keep:
+            # Unchanged since the previous run: keep it, re-place only
+            # if the stack layout moved
+            self.occ_by_rib[i] = old
+            if get_attr(old, "layout") != self.layout_sig:
+                mirror = self.mirror if get_attr(old, "mirrored") == "1" else None
+                old.transform = _rib_transform(i, self.pitch_in, self.layout_along_y, mirror)
+                set_attr(old, "layout", self.layout_sig)
+                report.add("ribs re-placed")
+            report.add("ribs kept")
+            return True
+        if old is not None:
+            old.deleteMe()
+            report.add("ribs rebuilt (changed)")
+        return False
+
+    def _add_instance(self, i):
+        """
+        Rib i has the same profile (within tolerance, maybe reversed) as an
+        earlier rib: another occurrence of its component.
+        """
+        source, reversed_ = self.canonical[i]
+        source_occ = self.occ_by_rib[source]
+        placement = _rib_transform(i, self.pitch_in, self.layout_along_y, self.mirror if reversed_ else None)
+        rib_occ = self.occs.addExistingComponent(source_occ.component, placement)
+        self.occ_by_rib[i] = rib_occ
+        _tag_rib(rib_occ, i, self.fingerprints[i], self.layout_sig, self.rib_tab_h)
+        if reversed_:
+            set_attr(rib_occ, "mirrored", 1)
+        set_attr(rib_occ, "builder", get_attr(source_occ, "builder"))
+
+    def _mesh_rib(self, i, rib_comp):
+        """Mesh body of rib i (rib-local frame) in rib_comp."""
+        self.progress.label = "meshing"
+        t_step = time.perf_counter()
+        rib_coords, rib_indices = self.mesh_ribs[i]
+        rib_comp.meshBodies.addByTriangleMeshData(rib_coords, rib_indices, [], [])
+        self.t_mesh += time.perf_counter() - t_step
+
+    def _brep_rib(self, i, rib_comp, rib_name, outline_pts) -> bool:
+        """
+        Direct B-rep body of rib i. False if its curve fit misses the
+        tolerance or Fusion rejects the body (the caller sketches it instead).
+        """
+        self.progress.label = "building B-rep"
+        t_step = time.perf_counter()
+        body = None
+        try:
+            if self.rib_fit_ok(i):
+                body = brep.rib_body(self.curve_fits[i], outline_pts, self.rib_thickness_in)
+            if body is not None and self.single_component:
+                # Transient bodies are placed before they enter the design
+                adsk.fusion.TemporaryBRepManager.get().transform(body, self.rib_transforms[i])
+                self.placed_bodies.append((rib_name, body))
+            elif body is not None:
+                brep.add_bodies(rib_comp, [body])
+        except RuntimeError:
+            # Fusion rejected the body
+            body = None
+        if body is None:
+            self.report.add("B-rep ribs rebuilt from sketch")
+        self.t_brep += time.perf_counter() - t_step
+        return body is not None
+
+    def _sketch_rib(self, i, rib_comp, rib_name, outline_pts) -> bool:
+        """
+        Sketch + extrude body of rib i (legacy: XZ plane, points emitted as
+        (x, z, 0)). False if the sketch has no profile.
+        """
+        self.progress.label = "sketching"
+        t_step = time.perf_counter()
+        sk = rib_comp.sketches.add(rib_comp.xZConstructionPlane)
+        # Don't re-solve after every spline/line add; one compute when
+        # deferral is lifted below
+        sk.isComputeDeferred = self.defer_sketch_compute
+        _draw_rib(sk, outline_pts, *self.rib_top(i))
+
+        sk.isComputeDeferred = False
+        profile_count = sk.profiles.count
+        self.t_sketch += time.perf_counter() - t_step
+        if profile_count == 0:
+            return False
+        prof = sk.profiles.item(0)
+
+        # Extrude thickness along +Y (legacy behavior)
+        self.progress.label = "extruding"
+        t_step = time.perf_counter()
+        ext = rib_comp.features.extrudeFeatures
+        ei = ext.createInput(prof, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+        ei.setDistanceExtent(False, adsk.core.ValueInput.createByString(f"{self.rib_thickness_in} in"))
+        rib_body = ext.add(ei).bodies.item(0)
+        self.t_extrude += time.perf_counter() - t_step
+        if self.single_component:
+            rib_body.name = rib_name
+            self.moved_bodies[i] = rib_body
+        return True
+
+    # ---- report ----
+
+    def finish(self):
+        """Closes the profile stream and adds the rib phase times to the report."""
+        report = self.report
+        if self.stream is not None:
+            self.stream.close()
+            report.add_subtime("rib loop waiting on profile worker", self.stream.stall_s)
+            report.set(
+                "profile queue (chunks)",
+                f"mean {self.stream.mean_depth:.1f}, max {self.stream.max_depth} of {self.stream.depth}"
+            )
+            report.set("profile queue stalls", self.stream.stalls)
+        report.add_time("rib sketches", self.t_sketch)
+        report.add_time("rib extrudes", self.t_extrude)
+        if self.brep_ribs:
+            report.add_time("rib bodies (B-rep)", self.t_brep)
+        if self.mesh_bodies:
+            report.add_time("rib bodies (mesh)", self.t_mesh)
+        if self.single_component:
+            report.add_time("rib placement", self.t_place)
+        # Remainder: components, placement and orientation
+        report.add_time(
+            "ribs",
+            time.perf_counter() - self.t_ribs - self.t_sketch - self.t_extrude - self.t_brep
+            - self.t_mesh - self.t_buffers - self.t_place
+        )
+
+
 def generate_flow_ribs(
     root,
     name_prefix: str,
@@ -64,36 +964,72 @@ def generate_flow_ribs(
 
     samples: int,
     smooth_passes: int,
+    parallel_profiles: bool,
+    adaptive_sampling: bool,
+    sample_tolerance_in: float,
+    decimate_points: bool,
+    nurbs_curves: bool,
+    nurbs_max_control_points: int,
+    defer_sketch_compute: bool,
+    brep_ribs: bool,
+    single_component: bool,
+    batch_sketch: bool,
+    dedupe_profiles: bool,
+    mesh_bodies: bool,
+    pipeline_ribs: bool,
 
     add_tabs: bool,
     tab_width_in: float,
     tab_height_in: float,
-    tab_centers_in
+    tab_centers_in,
+
+    update_occ=None,           # previous run's container to update in place
+    progress=None,             # the run's Progress dialog; one is made if None
+    report=None,
 ):
+    """
+    Builds the rib stack into a new run container (or updates update_occ,
+    the previous run's, in place) and returns the container occurrence.
+
+    Mode flags arrive resolved by generator.read_params: batch_sketch implies
+    single_component, mesh_bodies clears the other body builders and curve
+    options, and pipeline_ribs / dedupe_profiles are only set for one
+    component per rib. One builder then commits every rib: the whole stack
+    as one mesh, the batch sketch, or rib by rib (mesh, B-rep or sketch).
+    """
     ui = adsk.core.Application.get().userInterface
+    if report is None:
+        report = RunReport()
+    own_progress = progress is None
+    if own_progress:
+        progress = Progress(ui)
 
-    # Defensive clamps (match legacy feel)
-    rib_count = max(1, int(rib_count))
-    samples = max(40, int(samples))
-    rib_length_in = max(0.01, float(rib_length_in))
-    rib_height_in = max(0.01, float(rib_height_in))
     rib_thickness_in = max(0.01, float(rib_thickness_in))
     gap_between_ribs_in = max(0.0, float(gap_between_ribs_in))
-
-    randomness = max(0.0, min(1.0, float(randomness)))
-    wildness = max(0.0, min(1.0, float(wildness)))
-    smoothness = max(0.0, min(1.0, float(smoothness)))
-
-    base_amp_in = min(float(base_amplitude_in), rib_height_in)
-    base_period_in = max(0.01, float(bend_scale_in))  # legacy "wavePeriod" equivalent
     pitch_in = rib_thickness_in + gap_between_ribs_in
 
-    # Container component
-    container_occ = root.occurrences.addNewComponent(adsk.core.Matrix3D.create())
-    container_comp = container_occ.component
-    container_comp.name = f"{name_prefix}{rib_count}x_seed{seed}"
-    occs = container_comp.occurrences
-    rib_occs = []  # track rib occurrences so we can apply final orientation per-rib
+    # Profile math lives in flow_core.profiles (adsk-free); this function only
+    # commits the computed heights to Fusion. Each rib slices the flow surface
+    # at y = i * pitch_in.
+    p = profiles.profile_params(
+        seed=seed,
+        rib_count=rib_count,
+        rib_length_in=rib_length_in,
+        rib_height_in=rib_height_in,
+        randomness=randomness,
+        wildness=wildness,
+        smoothness=smoothness,
+        base_amplitude_in=base_amplitude_in,
+        bend_scale_in=bend_scale_in,
+        samples=samples,
+        smooth_passes=smooth_passes,
+        flow_angle_rad=flow_angle_rad,
+        flow_strength=flow_strength,
+        detail=detail,
+        use_mass=use_mass,
+        mass_strength=mass_strength,
+        rib_pitch_in=pitch_in,
+    )
 
     # Precompute tab spans along rib length
     tab_spans = []
@@ -101,190 +1037,158 @@ def generate_flow_ribs(
         centers = tab_centers_in or []
         for c in centers:
             x0 = max(0.0, float(c) - tab_width_in / 2.0)
-            x1 = min(rib_length_in, float(c) + tab_width_in / 2.0)
+            x1 = min(p["rib_length_in"], float(c) + tab_width_in / 2.0)
             if x1 > x0:
                 tab_spans.append((x0, x1))
         tab_spans.sort(key=lambda t: t[0], reverse=True)
 
-    # Master RNG (repeatability)
-    master = random.Random(int(seed))
+    run = _RibRun(
+        root, name_prefix, p,
+        rib_thickness_in=rib_thickness_in,
+        layout_along_y=layout_along_y,
+        parallel_profiles=parallel_profiles,
+        adaptive_sampling=adaptive_sampling,
+        sample_tolerance_in=sample_tolerance_in,
+        decimate_points=decimate_points,
+        nurbs_curves=nurbs_curves,
+        nurbs_max_control_points=nurbs_max_control_points,
+        defer_sketch_compute=defer_sketch_compute,
+        brep_ribs=brep_ribs,
+        single_component=single_component,
+        dedupe_profiles=dedupe_profiles,
+        mesh_bodies=mesh_bodies,
+        pipeline_ribs=pipeline_ribs,
+        tab_spans=tab_spans,
+        tab_height_in=tab_height_in,
+        update_occ=update_occ,
+        progress=progress,
+        report=report,
+        ui=ui,
+    )
 
-    # Bulge profile across ribs (legacy topography feel)
-    if rib_count > 1:
-        center = (rib_count - 1) * (0.35 + 0.30 * master.random())
-    else:
-        center = 0.0
-    sigma = max(1.0, rib_count * (0.14 + 0.10 * master.random()))
-
-    # Coupling term that can sweep diagonally across ribs
-    diag_strength = (2.0 * math.pi) * (0.5 + 4.0 * wildness) * (0.25 + 0.75 * randomness)
-
-    # End fade envelope (keep edges clean)
-    fade_power = 1.8 + 1.4 * smoothness
-
-    def envelope(x_in: float, rib_rng: random.Random) -> float:
-        shift = (rib_rng.uniform(-0.08, 0.08)) * (wildness * 0.7 + randomness * 0.3)
-        t = (x_in / rib_length_in) + shift
-        t = max(0.0, min(1.0, t))
-        return math.pow(math.sin(math.pi * t), fade_power)
+    try:
+        if mesh_bodies and single_component:
+            run.build_mesh_stack()
+        elif batch_sketch:
+            run.build_batch()
+        else:
+            run.build_per_rib()
 
-    # Build per-rib params (amp drift + bulge)
-    rib_params = []
-    for i in range(rib_count):
-        rib_rng = random.Random(int(seed) + i * 10007)
+    except GenerationCanceled as e:
+        if single_component and not batch_sketch:
+            run.t_place += run.place_bodies()
+        e.container_occ = run.container_occ
+        report.set("canceled after ribs", e.ribs_done)
+        raise
+    finally:
+        if own_progress:
+            progress.hide()
+        run.finish()
 
-        amp_var = 0.25
-        per_var = 0.30
-        phase_jitter = 0.25
+    return run.container_occ
 
-        Ai = base_amp_in * (1.0 + (amp_var * randomness) * rib_rng.uniform(-1.0, 1.0))
-        Pi = base_period_in * (1.0 + (per_var * randomness) * rib_rng.uniform(-1.0, 1.0))
-        Pi = max(3.0, Pi)
 
-        phi0 = rib_rng.uniform(0.0, 2.0 * math.pi) * (phase_jitter * randomness)
+# Keyword arguments of profiles.profile_params taken straight from the rib
+# inputs (rib_pitch_in is derived)
+_PROFILE_ARGS = (
+    "seed", "rib_count", "rib_length_in", "rib_height_in",
+    "randomness", "wildness", "smoothness", "base_amplitude_in", "bend_scale_in",
+    "samples", "smooth_passes", "flow_angle_rad", "flow_strength", "detail",
+    "use_mass", "mass_strength",
+)
 
-        bulge = 1.0
-        bulge_strength = 0.35
-        if rib_count > 1:
-            d = (i - center) / sigma
-            bulge = 1.0 + bulge_strength * randomness * math.exp(-(d * d))
 
-        rib_params.append((Ai, Pi, phi0, bulge))
+def rib_profile_params(rib_args) -> dict:
+    """The profiles.profile_params dict generate_flow_ribs(**rib_args) computes."""
+    thickness_in = max(0.01, float(rib_args["rib_thickness_in"]))
+    pitch_in = thickness_in + max(0.0, float(rib_args["gap_between_ribs_in"]))
+    return profiles.profile_params(rib_pitch_in=pitch_in, **{k: rib_args[k] for k in _PROFILE_ARGS})
 
-    # Progress dialog
-    prog = ui.createProgressDialog()
-    prog.isBackgroundTranslucent = False
-    prog.show("OrganicFlowRibs", "Generating rib %v of %m", 0, max(1, rib_count), 0)
 
-    try:
-        for i in range(rib_count):
-            prog.progressValue = i + 1
-            adsk.doEvents()
+def _preview_profiles(rib_args):
+    """
+    (pitch, thickness, RibProfiles) for the rib inputs if the held profiles
+    match them, else None after queueing them in the background: the preview
+    never computes or waits on the UI thread.
+    """
+    p = rib_profile_params(rib_args)
+    rib_profiles = profiles.remembered(p)
+    if rib_profiles is None:
+        precompute.PRECOMPUTE.submit(p)
+        return None
+    return p["rib_pitch_in"], max(0.01, float(rib_args["rib_thickness_in"])), rib_profiles
 
-            rib_occ = occs.addNewComponent(adsk.core.Matrix3D.create())
-            rib_occs.append(rib_occ)
-            rib_comp = rib_occ.component
-            rib_comp.name = f"Rib_{i+1:02d}"
 
-            # Sketch (legacy: XZ plane, points emitted as (x, z, 0))
-            sk = rib_comp.sketches.add(rib_comp.xZConstructionPlane)
-            curves = sk.sketchCurves
-            lines = curves.sketchLines
-            splines = curves.sketchFittedSplines
+def preview_flow_ribs(root, *, max_ribs: int, points: int, budget_s: float, **rib_args) -> int:
+    """
+    Cheap stand-in for the command preview: the top curve of every Nth rib
+    (at most max_ribs of them) as a fitted spline through `points` samples,
+    all in one sketch, placed where generate_flow_ribs would put the rib.
+    Stops adding ribs once budget_s has passed. Fusion discards the result
+    when the preview ends.
 
-            rib_rng = random.Random(int(seed) + i * 10007)
-            Ai, Pi, phi0, bulge = rib_params[i]
+    Draws only from profiles already computed for these inputs (the same
+    set OK builds from); if there are none yet, they are queued in the
+    background and nothing is drawn. Returns the number of ribs drawn.
+    """
+    t0 = time.perf_counter()
+    ready = _preview_profiles(rib_args)
+    if ready is None:
+        return 0
+    pitch_in, _, rib_profiles = ready
 
-            rib_t = 0.0 if rib_count == 1 else (i / (rib_count - 1))
+    rib_count = rib_profiles.rib_count
+    stride = max(1, math.ceil(rib_count / max(1, max_ribs)))
+    cols = mesh.sample_columns(len(rib_profiles.xs), points)
 
-            fitPts = adsk.core.ObjectCollection.create()
-            for s in range(samples + 1):
-                x_in = rib_length_in * s / samples
+    occ = root.occurrences.addNewComponent(adsk.core.Matrix3D.create())
+    comp = occ.component
+    comp.name = "OrganicFlowRibs preview"
+    sk = comp.sketches.add(comp.xZConstructionPlane)
+    sk.isComputeDeferred = True
 
-                env = envelope(x_in, rib_rng)
-                diag = diag_strength * (rib_t - 0.5) * (x_in / rib_length_in)
+    drawn = 0
+    for i in range(0, rib_count, stride):
+        if drawn and time.perf_counter() - t0 > budget_s:
+            break
+        heights = rib_profiles.heights[i]
+        m = _rib_transform(i, pitch_in, rib_args["layout_along_y"])
+        fit_pts = adsk.core.ObjectCollection.create()
+        for s in cols:
+            # Legacy rib sketch point (x, z, 0) -> model, then the rib's placement
+            pt = sk.sketchToModelSpace(adsk.core.Point3D.create(cm(rib_profiles.xs[s]), cm(heights[s]), 0))
+            pt.transformBy(m)
+            fit_pts.add(sk.modelToSketchSpace(pt))
+        sk.sketchCurves.sketchFittedSplines.add(fit_pts)
+        drawn += 1
 
-                z_in = rib_height_in - (env * (Ai * bulge)) * math.sin((2.0 * math.pi * x_in / Pi) + phi0 + diag)
-                z_in = max(0.0, min(rib_height_in, z_in))
+    sk.isComputeDeferred = False
+    return drawn
 
-                # Legacy coordinate quirk:
-                fitPts.add(adsk.core.Point3D.create(cm(x_in), cm(z_in), 0))
 
-            splines.add(fitPts)
+def preview_mesh(root, *, points: int, **rib_args):
+    """
+    Whole-sculpture preview as ONE custom-graphics triangle mesh (top strip
+    and side walls per rib, flow_core.mesh), no B-rep or sketches. Every rib
+    is drawn, at about `points` samples each.
 
-            # Close profile down to baseline (with optional tabs to negative z)
-            x_right = rib_length_in
-            z_right_in = fitPts.item(fitPts.count - 1).y / 2.54  # y holds "z" in legacy quirk
+    Custom graphics aren't part of the design, so Fusion doesn't discard
+    them with the preview: the caller deletes the returned group.
+    Returns (CustomGraphicsGroup, triangle count), or (None, 0) while the
+    profiles are still being computed in the background.
+    """
+    ready = _preview_profiles(rib_args)
+    if ready is None:
+        return None, 0
+    pitch_in, thickness_in, rib_profiles = ready
+    cols = mesh.sample_columns(len(rib_profiles.xs), points)
 
-            lines.addByTwoPoints(
-                adsk.core.Point3D.create(cm(x_right), cm(z_right_in), 0),
-                adsk.core.Point3D.create(cm(x_right), cm(0.0), 0)
-            )
+    rotation, offsets = _mesh_placement(rib_profiles.rib_count, pitch_in, rib_args["layout_along_y"])
+    coords, indices = mesh.heightfield_mesh(
+        rib_profiles.xs, rib_profiles.heights, cols, thickness_in, rotation, offsets
+    )
 
-            cur_x = rib_length_in
-            baseline_z = 0.0
-            tab_bottom_z = -tab_height_in
-
-            def P(xi, zi):
-                return adsk.core.Point3D.create(cm(xi), cm(zi), 0)
-
-            p = P(cur_x, baseline_z)
-
-            if add_tabs and len(tab_spans) > 0:
-                for (t0, t1) in tab_spans:
-                    if cur_x > t1:
-                        p2 = P(t1, baseline_z)
-                        lines.addByTwoPoints(p, p2)
-                        p = p2
-                        cur_x = t1
-
-                    # Down
-                    p2 = P(cur_x, tab_bottom_z)
-                    lines.addByTwoPoints(p, p2)
-                    p = p2
-
-                    # Left
-                    p2 = P(t0, tab_bottom_z)
-                    lines.addByTwoPoints(p, p2)
-                    p = p2
-                    cur_x = t0
-
-                    # Up
-                    p2 = P(cur_x, baseline_z)
-                    lines.addByTwoPoints(p, p2)
-                    p = p2
-
-                if cur_x > 0.0:
-                    p2 = P(0.0, baseline_z)
-                    lines.addByTwoPoints(p, p2)
-                    p = p2
-                    cur_x = 0.0
-            else:
-                p2 = P(0.0, baseline_z)
-                lines.addByTwoPoints(p, p2)
-                p = p2
-                cur_x = 0.0
-
-            # Close back up to curve start
-            z_left_in = fitPts.item(0).y / 2.54
-            lines.addByTwoPoints(P(0.0, baseline_z), P(0.0, z_left_in))
-
-            if sk.profiles.count == 0:
-                ui.messageBox(f"Profile failed on rib {i+1}. Try lowering amplitude or tab height.")
-                return
-
-            prof = sk.profiles.item(0)
-
-            # Extrude thickness along +Y (legacy behavior)
-            ext = rib_comp.features.extrudeFeatures
-            ei = ext.createInput(prof, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
-            ei.setDistanceExtent(False, adsk.core.ValueInput.createByString(f"{rib_thickness_in} in"))
-            ext.add(ei)
-    
-            # Place rib occurrences (legacy behavior)
-            m = adsk.core.Matrix3D.create()
-            if layout_along_y:
-                m.translation = adsk.core.Vector3D.create(0, cm(i * pitch_in), 0)
-            else:
-                m.translation = adsk.core.Vector3D.create(cm(i * pitch_in), 0, 0)
-            rib_occ.transform = m
-
-        # Final orientation: rotate EACH rib occurrence in-place (about its own pivot).
-        # This avoids edge cases where the container transform doesn't affect the first rib.
-        axis = adsk.core.Vector3D.create(0, 1, 0)
-        for ro in rib_occs:
-           
-            t = ro.transform.translation
-            pivot = adsk.core.Point3D.create(t.x, t.y, t.z)
-            rot = adsk.core.Matrix3D.create()
-            rot.setToRotation(
-                ORIENT_SIGN * (math.pi / 2),
-                axis,
-                pivot
-            )
-            cur = ro.transform.copy()
-            cur.transformBy(rot)
-            ro.transform = cur
+    group = root.customGraphicsGroups.add()
+    group.addMesh(adsk.fusion.CustomGraphicsCoordinates.create(coords), indices, [], [])
+    return group, len(indices) // 3
 
-    finally:
-        prog.hide()
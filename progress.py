@@ -0,0 +1,83 @@
+# progress.py
+# Throttled progress dialog for one generator run
+#
+# Repainting the dialog and pumping Fusion's event queue (adsk.doEvents) per
+# rib costs more than a rib on small, low-sample runs. Progress only does
+# both when at least `interval` seconds have passed since the last time, so
+# a 5 ms rib and a 500 ms rib cost the UI the same ~10 updates per second.
+
+import time
+import adsk.core
+
+
+def _fmt_eta(sec: float) -> str:
+    if sec < 60.0:
+        return f"~{sec:.0f} s left"
+    return f"~{sec / 60.0:.1f} min left"
+
+
+class Progress:
+    """
+    One progress dialog shared by the whole run (profiles, ribs, backer,
+    wall). begin() starts a stage and always repaints; step() reports ribs
+    finished within a counted stage and repaints at most once per interval.
+    `label` may be changed freely inside a stage (e.g. "sketching" /
+    "extruding" per rib); it shows on the next repaint.
+    """
+
+    def __init__(self, ui, title: str = "OrganicFlowRibs", interval: float = 0.1):
+        self.interval = interval
+        self.label = ""
+        self.total = 0        # ribs in the current stage, 0 if it doesn't count
+        self.done = 0
+        self.canceled = False
+        self.repaints = 0
+        self._t_stage = time.perf_counter()
+        self._t_last = 0.0
+        self._shown = True
+
+        self._dlg = ui.createProgressDialog()
+        self._dlg.isBackgroundTranslucent = False
+        self._dlg.isCancelButtonShown = True
+        self._dlg.show(title, "", 0, 1, 0)
+
+    def begin(self, label: str, total: int = 0):
+        """New stage; total > 0 makes it counted (progress bar and ETA)."""
+        self.label = label
+        self.total = max(0, int(total))
+        self.done = 0
+        self._t_stage = time.perf_counter()
+        self._repaint()
+
+    def step(self, done: int) -> bool:
+        """Ribs finished in this stage. Returns True once Cancel was pressed."""
+        self.done = done
+        if time.perf_counter() - self._t_last >= self.interval:
+            self._repaint()
+        return self.canceled
+
+    def hide(self):
+        if self._shown:
+            self._shown = False
+            self._dlg.hide()
+
+    def _message(self, now: float) -> str:
+        if self.total <= 0:
+            return f"{self.label}..."
+        text = f"{self.label}: {self.done} of {self.total} ribs"
+        elapsed = now - self._t_stage
+        if self.done > 0 and elapsed > 0.5:
+            text += ", " + _fmt_eta(elapsed / self.done * (self.total - self.done))
+        return text
+
+    def _repaint(self):
+        now = time.perf_counter()
+        self._t_last = now
+        dlg = self._dlg
+        dlg.maximumValue = max(1, self.total)
+        dlg.progressValue = min(self.done, max(1, self.total))
+        dlg.message = self._message(now)
+        adsk.doEvents()
+        self.repaints += 1
+        if dlg.wasCancelled:
+            self.canceled = True
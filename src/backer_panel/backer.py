@@ -19,6 +19,7 @@
 
 import adsk.core
 import adsk.fusion
+import time
 from util import cm
 
 
@@ -46,6 +47,8 @@ def build_backer_panel(
     backer_thickness_in: float,
     backer_tab_clearance_in: float,
     backer_margin_in: float,
+    defer_sketch_compute: bool = True,
+    report=None,
 ):
     app = adsk.core.Application.get()
     ui = app.userInterface
@@ -98,6 +101,7 @@ def build_backer_panel(
     #   X = rib length segment [backer_x0..backer_x1]
     #   Y = stack span [0..stack_span_in]
     sk = comp.sketches.add(comp.xYConstructionPlane)
+    sk.isComputeDeferred = defer_sketch_compute
     lines = sk.sketchCurves.sketchLines
 
     p0 = adsk.core.Point3D.create(cm(backer_x0), 0, 0)
@@ -109,6 +113,7 @@ def build_backer_panel(
     lines.addByTwoPoints(p1, p2)
     lines.addByTwoPoints(p2, p3)
     lines.addByTwoPoints(p3, p0)
+    sk.isComputeDeferred = False
 
     if sk.profiles.count == 0:
         ui.messageBox("Backer panel: failed to create base profile.")
@@ -140,7 +145,10 @@ def build_backer_panel(
     # --- Pocket sketch on the face at max Z (this is the "front" face at Z=0 after placement) ---
     front_face = max(body.faces, key=lambda f: f.boundingBox.maxPoint.z)
 
+    t_pockets = time.perf_counter()
     sk2 = comp.sketches.add(front_face)
+    # rib_count x tabs rectangles: solve once at the end, not after each line
+    sk2.isComputeDeferred = defer_sketch_compute
     sl = sk2.sketchCurves.sketchLines
 
     clear = backer_tab_clearance_in
@@ -172,7 +180,11 @@ def build_backer_panel(
             sl.addByTwoPoints(q2, q3)
             sl.addByTwoPoints(q3, q0)
 
-    if sk2.profiles.count == 0:
+    sk2.isComputeDeferred = False
+    profile_count = sk2.profiles.count
+    if report is not None:
+        report.add_subtime("backer pocket sketch", time.perf_counter() - t_pockets)
+    if profile_count == 0:
         ui.messageBox("Backer panel: pocket profiles failed (no profiles created).")
         return occ
 
@@ -0,0 +1,244 @@
+# src/flow_core/bspline.py
+#
+# Least-squares cubic B-spline fitting of rib profiles
+# ----------------------------------------------------
+# Instead of handing Fusion hundreds of fit points and letting its fitted
+# spline solver interpolate them, we fit a clamped cubic B-spline with a
+# bounded number of control points ourselves and create the curve directly
+# from its control points (NurbsCurve3D -> fixed sketch spline).
+#
+# Every rib is sampled at the same x positions, so the curve is parametrized
+# by u = x / rib_length and the control points' x coordinates are the
+# Greville abscissae * rib_length. B-splines reproduce linear functions, so
+# x(u) is exact and only z needs fitting. The basis matrix is then identical
+# for all ribs: one factorization per control-point count serves the stack.
+#
+# The first/last control points are pinned to the profile ends so the curve
+# meets the closing lines exactly.
+
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEGREE = 3
+
+
+class CurveFit:
+    """
+    One fitted rib curve.
+
+    knots    -- clamped knot vector in [0, 1] (count = len(ctrl_xs) + degree + 1)
+    ctrl_xs  -- control point x (inches)
+    ctrl_zs  -- control point z (inches)
+    max_dev  -- max |z_fit - z| over the profile samples (inches)
+    """
+
+    def __init__(self, knots, ctrl_xs, ctrl_zs, max_dev, degree=DEGREE):
+        self.knots = knots
+        self.ctrl_xs = ctrl_xs
+        self.ctrl_zs = ctrl_zs
+        self.max_dev = max_dev
+        self.degree = degree
+
+
+def clamped_knots(n_ctrl: int, degree: int = DEGREE):
+    """Uniform clamped knot vector on [0, 1]."""
+    spans = n_ctrl - degree
+    inner = [k / spans for k in range(1, spans)]
+    return [0.0] * (degree + 1) + inner + [1.0] * (degree + 1)
+
+
+def greville(knots, n_ctrl: int, degree: int = DEGREE):
+    """Greville abscissae: parameter of each control point."""
+    return [sum(knots[i + 1:i + degree + 1]) / degree for i in range(n_ctrl)]
+
+
+def _find_span(u: float, knots, n_ctrl: int, degree: int) -> int:
+    if u >= knots[n_ctrl]:
+        return n_ctrl - 1
+    lo, hi = degree, n_ctrl
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if u < knots[mid]:
+            hi = mid
+        else:
+            lo = mid
+    return lo
+
+
+def _basis_funs(span: int, u: float, knots, degree: int):
+    """The degree+1 nonzero basis values at u (Piegl & Tiller A2.2)."""
+    N = [1.0] + [0.0] * degree
+    left = [0.0] * (degree + 1)
+    right = [0.0] * (degree + 1)
+    for j in range(1, degree + 1):
+        left[j] = u - knots[span + 1 - j]
+        right[j] = knots[span + j] - u
+        saved = 0.0
+        for r in range(j):
+            tmp = N[r] / (right[r + 1] + left[j - r])
+            N[r] = saved + right[r + 1] * tmp
+            saved = left[j - r] * tmp
+        N[j] = saved
+    return N
+
+
+def basis_rows(us, knots, n_ctrl: int, degree: int = DEGREE):
+    """Sparse basis: per parameter, (first control index, degree+1 weights)."""
+    rows = []
+    for u in us:
+        span = _find_span(u, knots, n_ctrl, degree)
+        rows.append((span - degree, _basis_funs(span, u, knots, degree)))
+    return rows
+
+
+def control_ladder(max_ctrl, n_samples: int, min_ctrl: int = 8):
+    """
+    Control-point counts tried in order: doubling from min_ctrl up to the cap.
+    The cap is max_ctrl, but never more than 7/8 of the sample count (the
+    cap max_ctrl=None gives): close to interpolation, yet every knot span
+    still holds more than one sample, so the banded normal equations stay
+    positive definite.
+    """
+    cap = max(DEGREE + 1, n_samples * 7 // 8)
+    if max_ctrl is not None:
+        cap = max(DEGREE + 1, min(int(max_ctrl), cap))
+    out = []
+    n = max(DEGREE + 1, min(min_ctrl, cap))
+    while n < cap:
+        out.append(n)
+        n *= 2
+    out.append(cap)
+    return out
+
+
+def fit_profiles(prof, tol: float, max_ctrl):
+    """
+    Fits every rib of a RibProfiles. Each rib gets the smallest count on the
+    control ladder whose max deviation is within tol (or the cap, whatever
+    its deviation; max_ctrl=None for the near-interpolating cap).
+    Returns one CurveFit per rib.
+    """
+    xs = [float(x) for x in prof.xs]
+    length = xs[-1]
+    us = [x / length for x in xs]
+    n = len(us)
+
+    fits = [None] * prof.rib_count
+    pending = list(range(prof.rib_count))
+    ladder = control_ladder(max_ctrl, n)
+    for level, n_ctrl in enumerate(ladder):
+        knots = clamped_knots(n_ctrl)
+        ctrl_xs = [g * length for g in greville(knots, n_ctrl)]
+        rows = basis_rows(us, knots, n_ctrl)
+        last_level = level == len(ladder) - 1
+
+        if np is not None:
+            solved = _solve_numpy(rows, n_ctrl, np.asarray(prof.heights, dtype=float)[pending])
+        else:
+            solved = _solve_python(rows, n_ctrl, [prof.heights[i] for i in pending])
+
+        still = []
+        for i, (ctrl_zs, dev) in zip(pending, solved):
+            if dev <= tol or last_level:
+                fits[i] = CurveFit(knots, ctrl_xs, ctrl_zs, dev)
+            else:
+                still.append(i)
+        pending = still
+        if not pending:
+            break
+    return fits
+
+
+def _solve_numpy(rows, n_ctrl: int, Z):
+    """Pinned-end least squares for all rows of Z at once."""
+    n = Z.shape[1]
+    B = np.zeros((n, n_ctrl))
+    for s, (first, w) in enumerate(rows):
+        B[s, first:first + len(w)] = w
+
+    # Move the pinned end controls to the right-hand side
+    z0 = Z[:, 0]
+    z1 = Z[:, -1]
+    rhs = Z.T - np.outer(B[:, 0], z0) - np.outer(B[:, -1], z1)
+    inner, *_ = np.linalg.lstsq(B[:, 1:-1], rhs, rcond=None)
+
+    C = np.vstack([z0, inner, z1])           # (n_ctrl, ribs)
+    dev = np.abs(B @ C - Z.T).max(axis=0)
+    return [(C[:, k].tolist(), float(dev[k])) for k in range(Z.shape[0])]
+
+
+def _solve_python(rows, n_ctrl: int, Z):
+    """Same fit via banded normal equations (bandwidth = degree)."""
+    m = n_ctrl - 2
+    w_band = DEGREE
+
+    # Normal matrix over the interior controls, stored densely (m is small)
+    A = [[0.0] * m for _ in range(m)]
+    for first, w in rows:
+        for a, wa in enumerate(w):
+            ia = first + a - 1
+            if not 0 <= ia < m:
+                continue
+            for b, wb in enumerate(w):
+                ib = first + b - 1
+                if 0 <= ib < m:
+                    A[ia][ib] += wa * wb
+    L = _band_cholesky(A, w_band)
+
+    out = []
+    for z in Z:
+        z = [float(v) for v in z]
+        z0, z1 = z[0], z[-1]
+        rhs = [0.0] * m
+        for (first, w), zs in zip(rows, z):
+            # Residual after the pinned end controls
+            r = zs
+            for a, wa in enumerate(w):
+                j = first + a
+                if j == 0:
+                    r -= wa * z0
+                elif j == n_ctrl - 1:
+                    r -= wa * z1
+            for a, wa in enumerate(w):
+                ia = first + a - 1
+                if 0 <= ia < m:
+                    rhs[ia] += wa * r
+        ctrl = [z0] + _band_solve(L, rhs, w_band) + [z1]
+
+        dev = 0.0
+        for (first, w), zs in zip(rows, z):
+            fit = sum(wa * ctrl[first + a] for a, wa in enumerate(w))
+            dev = max(dev, abs(fit - zs))
+        out.append((ctrl, float(dev)))
+    return out
+
+
+def _band_cholesky(A, w: int):
+    m = len(A)
+    L = [[0.0] * m for _ in range(m)]
+    for j in range(m):
+        lo = max(0, j - w)
+        s = A[j][j] - sum(L[j][k] * L[j][k] for k in range(lo, j))
+        L[j][j] = math.sqrt(max(s, 1e-300))
+        for i in range(j + 1, min(m, j + w + 1)):
+            lo_i = max(0, i - w)
+            s = A[i][j] - sum(L[i][k] * L[j][k] for k in range(lo_i, j))
+            L[i][j] = s / L[j][j]
+    return L
+
+
+def _band_solve(L, b, w: int):
+    m = len(L)
+    y = [0.0] * m
+    for i in range(m):
+        lo = max(0, i - w)
+        y[i] = (b[i] - sum(L[i][k] * y[k] for k in range(lo, i))) / L[i][i]
+    x = [0.0] * m
+    for i in range(m - 1, -1, -1):
+        hi = min(m, i + w + 1)
+        x[i] = (y[i] - sum(L[k][i] * x[k] for k in range(i + 1, hi))) / L[i][i]
+    return x
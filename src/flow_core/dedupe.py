@@ -0,0 +1,99 @@
+# src/flow_core/dedupe.py
+#
+# Identical-profile detection
+# ---------------------------
+# Ribs whose profiles agree within the fit tolerance can share one Fusion
+# component: the first rib is built, the rest become extra occurrences of
+# it. A row matches an earlier *built* row when their max absolute
+# difference is within tol, either as is or reversed end to end (a mirrored
+# rib is the same part turned around).
+#
+# Candidates are found through the row means, which is exact rather than a
+# heuristic: max |a - b| <= tol implies |mean(a) - mean(b)| <= tol, and a
+# reversed row has the same mean. Rows are only compared with the handful of
+# built rows whose mean is that close, so nothing is missed at a bin edge.
+#
+# profile_key (a quantized digest) is only a fingerprint for incremental
+# runs, not a similarity test.
+
+import bisect
+import hashlib
+import struct
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def profile_key(row, quantum: float) -> bytes:
+    """Digest of a height row quantized to multiples of quantum."""
+    quantum = max(1e-9, float(quantum))
+    if np is not None:
+        q = np.rint(np.asarray(row, dtype=float) / quantum).astype("<i8")
+        return hashlib.blake2b(q.tobytes(), digest_size=16).digest()
+    q = [int(round(float(z) / quantum)) for z in row]
+    return hashlib.blake2b(struct.pack(f"<{len(q)}q", *q), digest_size=16).digest()
+
+
+def fingerprint(*parts) -> str:
+    """Short hex digest of parts (bytes as-is, anything else by repr)."""
+    h = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else repr(part).encode("utf-8"))
+        h.update(b"|")
+    return h.hexdigest()
+
+
+def _max_diff(a, b, reverse: bool) -> float:
+    if np is not None:
+        return float(np.max(np.abs((a[::-1] if reverse else a) - b)))
+    if reverse:
+        a = a[::-1]
+    return max(abs(x - y) for x, y in zip(a, b))
+
+
+class ProfileIndex:
+    """
+    Built rows, searchable for a row within tol (max absolute difference),
+    as is or reversed (mirrored=True). Rows are fed in rib order with match().
+    """
+
+    def __init__(self, tol: float, mirrored: bool = True):
+        self.tol = max(0.0, float(tol))
+        self.mirrored = mirrored
+        self._means = []    # sorted
+        self._rows = []     # (rib, row), in _means order
+
+    def match(self, k: int, row):
+        """
+        (source rib, reversed) for row k: an earlier built row it matches,
+        or (k, False) if it is new (it is then recorded as built).
+        """
+        if np is not None:
+            row = np.asarray(row, dtype=float)
+            mean = float(row.mean())
+        else:
+            row = [float(z) for z in row]
+            mean = sum(row) / len(row)
+
+        lo = bisect.bisect_left(self._means, mean - self.tol)
+        hi = bisect.bisect_right(self._means, mean + self.tol)
+        for reverse in ((False, True) if self.mirrored else (False,)):
+            for src, built in self._rows[lo:hi]:
+                if len(built) == len(row) and _max_diff(row, built, reverse) <= self.tol:
+                    return src, reverse
+
+        at = bisect.bisect_right(self._means, mean)
+        self._means.insert(at, mean)
+        self._rows.insert(at, (k, row))
+        return k, False
+
+
+def canonical_ribs(prof, tol: float, mirrored: bool = True):
+    """
+    For each row of a RibProfiles, (source rib, reversed): the first row it
+    matches within tol (ProfileIndex), or (its own index, False).
+    """
+    index = ProfileIndex(tol, mirrored)
+    return [index.match(k, row) for k, row in enumerate(prof.heights)]
@@ -0,0 +1,139 @@
+# src/flow_core/mesh.py
+#
+# Heightfield triangle mesh for the custom-graphics preview
+# ---------------------------------------------------------
+# The whole sculpture as one triangle mesh, straight from the rib x sample
+# height grid: per rib a top strip (the relief surface across the rib
+# thickness) and the two side walls down to the baseline. The preview leaves
+# ends and bottoms out; closed=True adds them (mesh-body builds). Tabs are
+# never meshed.
+#
+# Every rib has the same vertex and triangle layout: rib r owns vertices
+# r * V .. (r + 1) * V - 1, and its triangles are rib 0's shifted by r * V.
+#
+# Output is flat coordinate and index lists (Fusion's CustomGraphicsMesh
+# takes exactly that), built in one broadcast pass with NumPy, or one loop
+# without it.
+#
+# Rib-local frame (legacy sketch + extrude, in cm): x along the rib length,
+# y through the thickness (0 .. thickness), z = -height. Each rib is then
+# placed as  rotation @ local + offset_i  (rotation shared by every rib).
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+IN_TO_CM = 2.54
+
+# Per column, vertices k = 0..3: top front, top back, base front, base back.
+# Triangles between column c (a) and c + 1 (b), as (column, k) pairs:
+# top strip, front wall (y = 0), back wall (y = thickness).
+_QUAD_TRIS = (
+    ((0, 0), (1, 0), (1, 1)), ((0, 0), (1, 1), (0, 1)),
+    ((0, 2), (1, 2), (1, 0)), ((0, 2), (1, 0), (0, 0)),
+    ((0, 1), (1, 1), (1, 3)), ((0, 1), (1, 3), (0, 3)),
+)
+# closed=True: the bottom strip between every column pair, and the two end caps
+_QUAD_TRIS_BOTTOM = (
+    ((0, 2), (0, 3), (1, 3)), ((0, 2), (1, 3), (1, 2)),
+)
+_CAP_TRIS = (
+    (0, 2, 3), (0, 3, 1),
+)
+
+
+def sample_columns(n: int, points: int):
+    """About `points` evenly spaced indices into n samples, both ends included."""
+    step = max(1, (n - 1) // max(1, points - 1))
+    cols = list(range(0, n, step))
+    if cols[-1] != n - 1:
+        cols.append(n - 1)
+    return cols
+
+
+def _rib_triangles(c: int, closed: bool):
+    """Vertex triples of one rib with c columns, vertex 0 = its first."""
+    quads = _QUAD_TRIS + (_QUAD_TRIS_BOTTOM if closed else ())
+    tris = [
+        tuple((col + dc) * 4 + k for dc, k in corners)
+        for col in range(c - 1)
+        for corners in quads
+    ]
+    if closed:
+        last = (c - 1) * 4
+        tris += [(a, c_, b) for a, b, c_ in _CAP_TRIS]
+        tris += [tuple(last + v for v in t) for t in _CAP_TRIS]
+    # The tables above wind clockwise seen from outside (local z is -height)
+    return [(a, c_, b) for a, b, c_ in tris]
+
+
+def heightfield_mesh(xs, heights, cols, thickness_in: float, rotation, offsets_in, closed: bool = False):
+    """
+    Flat (coordinates, indices) for the ribs in `heights` (rows) sampled at
+    columns `cols`.
+
+    rotation   -- 3x3 nested sequence applied to every rib's local frame
+    offsets_in -- per-row (x, y, z) placement offsets, inches
+    closed     -- add bottoms and end caps (a watertight mesh per rib)
+
+    Coordinates are cm, three per vertex; indices are three per triangle.
+    """
+    if np is not None:
+        return _mesh_numpy(xs, heights, cols, thickness_in, rotation, offsets_in, closed)
+    return _mesh_python(xs, heights, cols, thickness_in, rotation, offsets_in, closed)
+
+
+def rib_slices(coords, indices, rib_count: int):
+    """
+    Splits a heightfield_mesh result into per-rib (coordinates, indices);
+    every rib reuses rib 0's index list.
+    """
+    nc = len(coords) // rib_count
+    rib0 = indices[:len(indices) // rib_count]
+    return [(coords[r * nc:(r + 1) * nc], rib0) for r in range(rib_count)]
+
+
+def _mesh_numpy(xs, heights, cols, thickness_in, rotation, offsets_in, closed):
+    cols = np.asarray(cols)
+    x = np.asarray(xs, dtype=float)[cols] * IN_TO_CM
+    h = np.asarray(heights, dtype=float)[:, cols] * IN_TO_CM
+    ribs, c = h.shape
+    t = thickness_in * IN_TO_CM
+
+    local = np.zeros((ribs, c, 4, 3))
+    local[..., 0] = x[None, :, None]
+    local[:, :, 1::2, 1] = t
+    local[:, :, :2, 2] = -h[:, :, None]
+
+    world = local.reshape(ribs, -1, 3) @ np.asarray(rotation, dtype=float).T
+    world += (np.asarray(offsets_in, dtype=float) * IN_TO_CM)[:, None, :]
+
+    # Index of (rib, column, k) is (rib * c + column) * 4 + k
+    rib0 = np.array(_rib_triangles(c, closed)).reshape(1, -1)
+    indices = (np.arange(ribs) * (c * 4))[:, None] + rib0
+    return world.ravel().tolist(), indices.ravel().tolist()
+
+
+def _mesh_python(xs, heights, cols, thickness_in, rotation, offsets_in, closed):
+    t = thickness_in * IN_TO_CM
+    (r00, r01, r02), (r10, r11, r12), (r20, r21, r22) = rotation
+    c = len(cols)
+    rib0 = [v for tri in _rib_triangles(c, closed) for v in tri]
+
+    coords = []
+    indices = []
+    for r, (row, off) in enumerate(zip(heights, offsets_in)):
+        ox, oy, oz = (v * IN_TO_CM for v in off)
+        for s in cols:
+            x = xs[s] * IN_TO_CM
+            z_top = -row[s] * IN_TO_CM
+            for y, z in ((0.0, z_top), (t, z_top), (0.0, 0.0), (t, 0.0)):
+                coords.extend((
+                    r00 * x + r01 * y + r02 * z + ox,
+                    r10 * x + r11 * y + r12 * z + oy,
+                    r20 * x + r21 * y + r22 * z + oz,
+                ))
+        base = r * c * 4
+        indices.extend(base + v for v in rib0)
+    return coords, indices
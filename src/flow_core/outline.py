@@ -0,0 +1,44 @@
+# src/flow_core/outline.py
+#
+# Straight-edged part of a rib profile
+# ------------------------------------
+# A rib outline is the top curve (x = 0 -> rib_length) closed by straight
+# segments: down the right end, along the baseline (dropping below it for
+# each tab), and back up the left end. Both rib builders (sketch + extrude
+# and direct B-rep) draw the same point list so their outlines match.
+#
+# Coordinates are (x, z) in inches, z measured from the rib baseline.
+
+
+def closing_outline(rib_length_in: float, z_right_in: float, z_left_in: float, tab_spans, tab_height_in: float):
+    """
+    Points from the right end of the top curve (rib_length_in, z_right_in)
+    around the bottom to the left end (0, z_left_in).
+
+    tab_spans -- (x0, x1) tab extents sorted right to left; empty for no tabs.
+    Tabs drop to -tab_height_in. Consecutive points may coincide (e.g. a
+    zero end height); callers that need distinct points should skip them.
+    """
+    baseline_z = 0.0
+    tab_bottom_z = -tab_height_in
+
+    cur_x = rib_length_in
+    pts = [(rib_length_in, z_right_in), (cur_x, baseline_z)]
+
+    for (t0, t1) in tab_spans:
+        if cur_x > t1:
+            pts.append((t1, baseline_z))
+            cur_x = t1
+
+        # Down, left, up
+        pts.append((cur_x, tab_bottom_z))
+        pts.append((t0, tab_bottom_z))
+        cur_x = t0
+        pts.append((cur_x, baseline_z))
+
+    if cur_x > 0.0:
+        pts.append((0.0, baseline_z))
+
+    # Close back up to curve start
+    pts.append((0.0, z_left_in))
+    return pts
@@ -0,0 +1,126 @@
+# src/flow_core/pipeline.py
+#
+# Streaming rib producer
+# ----------------------
+# Overlaps the rib math with the Fusion commits: a worker thread evaluates
+# the profile stack a chunk of ribs at a time (heights plus whatever per-rib
+# fit data the caller asks for) and feeds a bounded queue, while the UI
+# thread takes rib i, sketches and extrudes it, and takes rib i + 1. With a
+# full queue the worker waits, so at most `depth` chunks are ever held
+# ahead of the consumer.
+#
+# Chunks are contiguous rib ranges evaluated with profiles.compute_profiles,
+# so streamed rows are bit-identical to a whole-stack run (see parallel.py).
+# Nothing here touches adsk.
+
+import queue
+import threading
+import time
+
+from flow_core import profiles
+
+CHUNK_RIBS = 8      # ribs per queued chunk
+QUEUE_DEPTH = 4     # chunks buffered ahead of the consumer
+
+
+class RibStream:
+    """
+    Producer thread + bounded queue of rib chunks, consumed in rib order.
+
+    rib_work(chunk) -- called on the worker with a RibProfiles for one chunk;
+                       returns one payload per row (e.g. curve fits)
+    held            -- profiles already computed for p (only sliced, not
+                       re-evaluated), or None
+    """
+
+    def __init__(self, p: dict, rib_work, held=None, chunk: int = CHUNK_RIBS, depth: int = QUEUE_DEPTH):
+        self.rib_count = p["rib_count"]
+        self.depth = depth
+        self.stall_s = 0.0      # consumer time spent waiting on the worker
+        self.stalls = 0
+        self.max_depth = 0      # most chunks seen queued when the consumer asked
+        self._depth_sum = 0
+        self._takes = 0
+
+        self._p = p
+        self._rib_work = rib_work
+        self._held = held
+        self._chunk = max(1, int(chunk))
+        self._q = queue.Queue(maxsize=max(1, int(depth)))
+        self._stop = threading.Event()
+        self._rows = {}         # rib index -> (heights row, payload), not yet taken
+        self._next_chunk = 0    # first rib index not yet received
+
+        self._thread = threading.Thread(target=self._produce, name="OrganicFlowRibs rib stream", daemon=True)
+        self._thread.start()
+
+    @property
+    def mean_depth(self) -> float:
+        return self._depth_sum / self._takes if self._takes else 0.0
+
+    def rib(self, i: int, idle=None):
+        """
+        (heights row, payload) for rib i, blocking until its chunk arrives.
+        Ribs must be taken in order. idle() is called every ~0.1 s while
+        blocked (keep the UI alive, check for cancel; it may raise).
+        """
+        while i >= self._next_chunk:
+            self._takes += 1
+            depth = self._q.qsize()
+            self._depth_sum += depth
+            self.max_depth = max(self.max_depth, depth)
+
+            t0 = time.perf_counter()
+            item = None
+            while item is None:
+                try:
+                    item = self._q.get(timeout=0.1)
+                except queue.Empty:
+                    if idle is not None:
+                        idle()
+            waited = time.perf_counter() - t0
+            if depth == 0:
+                self.stalls += 1
+                self.stall_s += waited
+
+            if isinstance(item, BaseException):
+                raise item
+            start, rows, payloads = item
+            for k, (row, payload) in enumerate(zip(rows, payloads)):
+                self._rows[start + k] = (row, payload)
+            self._next_chunk = start + len(rows)
+        return self._rows.pop(i)
+
+    def close(self):
+        """Stops the worker (also after an early exit) and drops queued chunks."""
+        self._stop.set()
+        while self._thread.is_alive():
+            try:
+                self._q.get_nowait()
+            except queue.Empty:
+                self._thread.join(0.05)
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self):
+        try:
+            for start in range(0, self.rib_count, self._chunk):
+                if self._stop.is_set():
+                    return
+                stop = min(self.rib_count, start + self._chunk)
+                if self._held is not None:
+                    chunk = profiles.RibProfiles(self._held.xs, self._held.heights[start:stop], range(start, stop))
+                else:
+                    chunk = profiles.compute_profiles(self._p, ribs=range(start, stop))
+                payloads = self._rib_work(chunk)
+                if not self._put((start, list(chunk.heights), payloads)):
+                    return
+        except Exception as e:
+            self._put(e)
@@ -0,0 +1,138 @@
+# src/flow_core/precompute.py
+#
+# Background profile precomputation
+# ---------------------------------
+# While the dialog is open, every input change submits the current profile
+# parameters. One worker thread computes them after a short quiet period
+# (debounce), always for the newest submission: a job still waiting is
+# replaced, and a finished job is only published if nothing newer arrived.
+# The result lands in profiles.reuse_profiles' slot, so OK finds the
+# profiles ready and goes straight to the Fusion commit. Jobs whose profiles
+# that slot already holds (e.g. the preview computed them) are dropped.
+#
+# The generator goes through wait() before computing anything itself, so
+# the same profiles are never computed twice. The preview never waits: it
+# draws from the held profiles or submits and skips, and on_published tells
+# the dialog to redraw once they land.
+#
+# Nothing here touches adsk; the worker only runs flow_core math.
+
+import threading
+import time
+
+from flow_core import profiles
+
+DEBOUNCE_S = 0.25
+
+
+class ProfilePrecompute:
+    """Debounced single-worker profile computation, newest job wins."""
+
+    def __init__(self, debounce_s: float = DEBOUNCE_S):
+        self.debounce_s = debounce_s
+        self._cond = threading.Condition()
+        self._pending = None    # (key, p, due time) waiting to start
+        self._running = None    # key being computed
+        self._published = None  # RibProfiles this worker last published
+        self._thread = None
+        self._stop = False
+        # Called with no arguments from the worker thread after each publish;
+        # must be thread-safe (the add-in fires a Fusion custom event)
+        self.on_published = None
+        self.computed = 0
+        self.superseded = 0
+
+    def submit(self, p: dict):
+        """Schedules p (a profile_params dict); replaces any job not yet started."""
+        key = profiles.params_key(p)
+        with self._cond:
+            if key in (profiles.remembered_key(), self._running):
+                self._pending = None
+                return
+            if self._pending is not None and self._pending[0] != key:
+                self.superseded += 1
+            self._pending = (key, p, time.perf_counter() + self.debounce_s)
+            self._stop = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="OrganicFlowRibs precompute", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def wait(self, p: dict, timeout_s: float = 60.0) -> bool:
+        """
+        If p is queued or being computed, starts it now (no debounce) and
+        blocks until it is published. True only if the profiles now held for
+        p were computed by this worker; False if nothing is held for p, or
+        they were computed elsewhere (preview, an earlier run).
+        """
+        key = profiles.params_key(p)
+        deadline = time.perf_counter() + timeout_s
+        with self._cond:
+            if self._pending is not None and self._pending[0] == key:
+                self._pending = (key, self._pending[1], 0.0)
+                self._cond.notify_all()
+            while profiles.remembered_key() != key:
+                queued = self._pending is not None and self._pending[0] == key
+                if not (queued or self._running == key):
+                    return False
+                left = deadline - time.perf_counter()
+                if left <= 0.0:
+                    return False
+                self._cond.wait(left)
+            held = profiles.remembered(p)
+            return held is not None and held is self._published
+
+    def shutdown(self):
+        with self._cond:
+            self._stop = True
+            self._pending = None
+            self._cond.notify_all()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._stop:
+                    if self._pending is not None:
+                        left = self._pending[2] - time.perf_counter()
+                        if left <= 0.0:
+                            break
+                        self._cond.wait(left)
+                    else:
+                        self._cond.wait()
+                if self._stop:
+                    return
+                key, p, _ = self._pending
+                self._pending = None
+                if key == profiles.remembered_key():
+                    # Published meanwhile by someone else (the preview)
+                    self._cond.notify_all()
+                    continue
+                self._running = key
+
+            try:
+                prof = profiles.compute_profiles(p)
+            except Exception:
+                prof = None
+
+            published = False
+            with self._cond:
+                self._running = None
+                if prof is not None and self._pending is None and not self._stop:
+                    profiles.remember_profiles(p, prof)
+                    self._published = prof
+                    self.computed += 1
+                    published = True
+                elif prof is not None:
+                    self.superseded += 1
+                self._cond.notify_all()
+
+            callback = self.on_published
+            if published and callback is not None:
+                try:
+                    callback()
+                except Exception:
+                    pass
+
+
+# Shared by the dialog (submit, on_published) and the generator (wait)
+PRECOMPUTE = ProfilePrecompute()
@@ -0,0 +1,290 @@
+# src/flow_core/profiles.py
+#
+# Headless rib profile engine for OrganicFlowRibs
+# -----------------------------------------------
+# All of the per-rib math that used to live inside geometry.generate_flow_ribs:
+# the end-fade envelope and the final z(x) formula, driven by the relief terms
+# in surface.py (per-rib wave, directional flow, detail, mass).
+#
+# This module must never import adsk. It loads on stock CPython so profiles
+# can be benchmarked, cached and computed off the Fusion UI thread; geometry.py
+# only turns the returned numbers into sketches and bodies.
+#
+# Units are inches throughout. Heights are measured from the rib baseline.
+
+import math
+import threading
+
+from flow_core import rng
+from flow_core import smoothing
+from flow_core import surface
+from flow_core.surface import rib_params  # noqa: F401  (public re-export)
+
+try:
+    import numpy as np
+except ImportError:  # Fusion builds without NumPy use the pure-Python loop
+    np = None
+
+
+def profile_params(
+    *,
+    seed: int,
+    rib_count: int,
+    rib_length_in: float,
+    rib_height_in: float,
+    randomness: float,
+    wildness: float,
+    smoothness: float,
+    base_amplitude_in: float,
+    bend_scale_in: float,
+    samples: int,
+    smooth_passes: int = 0,
+    flow_angle_rad: float = 0.0,
+    flow_strength: float = 0.0,
+    detail: float = 0.0,
+    use_mass: bool = False,
+    mass_strength: float = 0.0,
+    rib_pitch_in: float = 0.0,
+) -> dict:
+    """
+    Applies the legacy defensive clamps and returns a plain dict that fully
+    describes a profile run. Everything downstream keys off this dict.
+    """
+    rib_height_in = max(0.01, float(rib_height_in))
+    return {
+        "seed": int(seed),
+        "rib_count": max(1, int(rib_count)),
+        "rib_length_in": max(0.01, float(rib_length_in)),
+        "rib_height_in": rib_height_in,
+        "randomness": max(0.0, min(1.0, float(randomness))),
+        "wildness": max(0.0, min(1.0, float(wildness))),
+        "smoothness": max(0.0, min(1.0, float(smoothness))),
+        "base_amplitude_in": min(float(base_amplitude_in), rib_height_in),
+        "bend_scale_in": max(0.01, float(bend_scale_in)),
+        "samples": max(40, int(samples)),
+        "smooth_passes": max(0, int(smooth_passes)),
+        "flow_angle_rad": float(flow_angle_rad),
+        "flow_strength": max(0.0, min(1.0, float(flow_strength))),
+        "detail": max(0.0, min(1.0, float(detail))),
+        "use_mass": bool(use_mass),
+        "mass_strength": max(0.0, min(1.0, float(mass_strength))),
+        # Stack spacing: where each rib slices the flow surface (y = i * pitch)
+        "rib_pitch_in": max(0.0, float(rib_pitch_in)),
+    }
+
+
+class RibProfiles:
+    """
+    Height samples for a set of ribs.
+
+    xs      -- sample positions along the rib length (inches)
+    heights -- one row of heights per rib, heights[k][s] is z at xs[s]
+    ribs    -- rib index of each row (a range; rows need not start at rib 0)
+    """
+
+    def __init__(self, xs, heights, ribs=None):
+        self.xs = xs
+        self.heights = heights
+        self.ribs = ribs if ribs is not None else range(len(heights))
+
+    @property
+    def rib_count(self) -> int:
+        return len(self.heights)
+
+    def points(self, k: int):
+        """(x, z) pairs for row k, left to right."""
+        return list(zip(self.xs, self.heights[k]))
+
+
+# Last profile set computed, reused when the same parameters come back (the
+# live preview or the background precompute computes the profiles, OK then
+# builds from the same set). One (key, RibProfiles) tuple, swapped whole so a
+# worker thread can publish it.
+_last = (None, None)
+
+# compute_profiles shares surface.CACHE, which isn't thread-safe
+_compute_lock = threading.Lock()
+
+
+def params_key(p: dict):
+    """Hashable key of a profile_params() dict."""
+    return tuple(sorted(p.items()))
+
+
+def remembered_key():
+    """params_key of the profiles reuse_profiles currently holds, or None."""
+    return _last[0]
+
+
+def remembered(p: dict):
+    """The held RibProfiles if they were computed for p, else None."""
+    key, prof = _last
+    return prof if key == params_key(p) else None
+
+
+def remember_profiles(p: dict, prof):
+    global _last
+    _last = (params_key(p), prof)
+
+
+def reuse_profiles(p: dict, compute):
+    """
+    compute() for parameter dict p, or the previous result if p is unchanged
+    since the last call. Returns (RibProfiles, reused). Callers must not
+    modify the returned profiles.
+    """
+    key, prof = _last
+    if key == params_key(p):
+        return prof, True
+    prof = compute()
+    remember_profiles(p, prof)
+    return prof, False
+
+
+def forget_profiles():
+    global _last
+    _last = (None, None)
+
+
+def sample_xs(p: dict, span=None):
+    """
+    Uniform sample positions along the rib: samples + 1 points, both ends
+    included. span=(s0, s1) limits the result to sample indices s0 .. s1-1.
+    """
+    length = p["rib_length_in"]
+    samples = p["samples"]
+    s0, s1 = span or (0, samples + 1)
+    return [length * s / samples for s in range(s0, s1)]
+
+
+def compute_profiles(p: dict, ribs=None, span=None) -> RibProfiles:
+    """
+    Evaluates rib profiles for the parameter dict from profile_params().
+
+    ribs -- range of rib indices to evaluate (default: every rib)
+    span -- (s0, s1) half-open range of sample indices (default: all samples)
+
+    Any subset gives exactly the values a full run produces for those ribs and
+    samples. With NumPy the grid is computed in one broadcast pass and heights
+    come back as a 2D array; otherwise heights are a list of lists.
+
+    Smoothing (smooth_passes) is applied to all rows in one batched pass.
+    Safe to call from several threads; calls run one at a time.
+    """
+    with _compute_lock:
+        return _compute_profiles(p, ribs, span)
+
+
+def _compute_profiles(p: dict, ribs, span) -> RibProfiles:
+    n = p["samples"] + 1
+    if ribs is None:
+        ribs = range(p["rib_count"])
+    if span is None:
+        span = (0, n)
+
+    # Smoothing reads `passes` neighbours on each side, so evaluate a padded
+    # span and crop. Only the true rib ends are reflected (pinned).
+    passes = p.get("smooth_passes", 0)
+    s0, s1 = span
+    e0 = max(0, s0 - passes)
+    e1 = min(n, s1 + passes)
+
+    if np is not None:
+        prof = _compute_numpy(p, ribs, (e0, e1))
+    else:
+        prof = _compute_python(p, ribs, (e0, e1))
+
+    if passes > 0:
+        prof.heights = smoothing.smooth_rows(prof.heights, passes)
+    if (e0, e1) != (s0, s1):
+        a, b = s0 - e0, s1 - e0
+        prof.xs = prof.xs[a:b]
+        if np is not None:
+            prof.heights = prof.heights[:, a:b]
+        else:
+            prof.heights = [row[a:b] for row in prof.heights]
+    return prof
+
+
+# Parameters the envelope reads (its cache key, together with the grid block)
+ENVELOPE_KEYS = ("seed", "rib_length_in", "samples", "smoothness", "wildness", "randomness")
+
+
+def _envelope_terms(p: dict):
+    """End fade envelope constants (keep edges clean)."""
+    fade_power = 1.8 + 1.4 * p["smoothness"]
+    shift_scale = p["wildness"] * 0.7 + p["randomness"] * 0.3
+    return fade_power, shift_scale
+
+
+def _envelope(p: dict, grid):
+    """Per-sample end fade over the grid, cached alongside the relief terms."""
+    key = ("envelope", tuple(p[k] for k in ENVELOPE_KEYS), grid.key)
+    if np is not None:
+        return surface.CACHE.get(key, lambda: _envelope_numpy(p, grid))
+    return surface.CACHE.get(key, lambda: _envelope_python(p, grid))
+
+
+def _envelope_python(p: dict, grid):
+    length = p["rib_length_in"]
+    fade_power, shift_scale = _envelope_terms(p)
+    s0, s1 = grid.span
+
+    rows = []
+    for i in grid.ribs:
+        draws = rng.uniforms(p["seed"], i, rng.PURPOSE_ENVELOPE, s1 - s0, s0)
+        row = []
+        for x_in, d in zip(grid.xs, draws):
+            shift = (-0.08 + 0.16 * d) * shift_scale
+            t = max(0.0, min(1.0, (x_in / length) + shift))
+            row.append(math.pow(math.sin(math.pi * t), fade_power))
+        rows.append(row)
+    return rows
+
+
+def _envelope_numpy(p: dict, grid):
+    length = p["rib_length_in"]
+    fade_power, shift_scale = _envelope_terms(p)
+    s0, s1 = grid.span
+
+    # sin(pi * clip(u + shift))**fade_power, built in place
+    env = rng.uniforms_array(p["seed"], grid.ribs, rng.PURPOSE_ENVELOPE, s1 - s0, s0)
+    env *= 0.16
+    env += -0.08
+    env *= shift_scale
+    env += grid.xs / length
+    np.clip(env, 0.0, 1.0, out=env)
+    env *= math.pi
+    np.sin(env, out=env)
+    np.power(env, fade_power, out=env)
+    return env
+
+
+def _compute_python(p: dict, ribs, span) -> RibProfiles:
+    height = p["rib_height_in"]
+
+    grid = surface.Grid(p, ribs, span)
+    relief = surface.DEFAULT_MODEL.relief(p, grid)
+    envelope = _envelope(p, grid)
+
+    heights = []
+    for env_row, rel_row in zip(envelope, relief):
+        row = []
+        for env, rel in zip(env_row, rel_row):
+            z_in = height - env * rel
+            row.append(max(0.0, min(height, z_in)))
+        heights.append(row)
+
+    return RibProfiles(grid.xs, heights, ribs)
+
+
+def _compute_numpy(p: dict, ribs, span) -> RibProfiles:
+    height = p["rib_height_in"]
+
+    grid = surface.Grid(p, ribs, span)
+    z = surface.DEFAULT_MODEL.relief(p, grid)
+
+    z *= _envelope(p, grid)
+    np.subtract(height, z, out=z)
+    np.clip(z, 0.0, height, out=z)
+    return RibProfiles(grid.xs, z, ribs)
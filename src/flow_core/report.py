@@ -0,0 +1,108 @@
+# src/flow_core/report.py
+#
+# Run report: per-phase timings and counters for one generator run.
+# Printed to the Text Commands window after every run; optionally shown in a
+# message box (Housekeeping > Show run report).
+
+import time
+from contextlib import contextmanager
+
+
+def _fmt_seconds(sec: float) -> str:
+    if sec < 1.0:
+        return f"{sec * 1000.0:.0f} ms"
+    return f"{sec:.2f} s"
+
+
+class RunReport:
+    """Timings and counters collected during one generator run."""
+
+    def __init__(self, title: str = "OrganicFlowRibs run report"):
+        self.title = title
+        self.phases = {}      # phase name -> seconds, in first-seen order
+        self.subphases = {}   # part of a phase -> seconds; not added to the total
+        self.counts = {}      # counter name -> value, in first-seen order
+        self.rib_points = []  # per rib: (points before decimation, points sent)
+        self.points_label = "fit points"
+        self.rib_deviation = []  # per rib: max curve deviation (in), NURBS mode
+        self.rib_tolerance = None  # fit tolerance (in); ribs over it are flagged
+
+    @contextmanager
+    def phase(self, name: str):
+        """Times the enclosed block and adds it to `name`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def add_time(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_subtime(self, name: str, seconds: float):
+        """Time spent in part of an enclosing phase (listed, not totalled)."""
+        self.subphases[name] = self.subphases.get(name, 0.0) + seconds
+
+    def set(self, name: str, value):
+        self.counts[name] = value
+
+    def add(self, name: str, value=1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def summary_lines(self):
+        lines = [self.title]
+        if self.phases:
+            width = max(len(k) for k in self.phases)
+            for name, sec in self.phases.items():
+                lines.append(f"  {name.ljust(width)}  {_fmt_seconds(sec)}")
+            lines.append(f"  {'total'.ljust(width)}  {_fmt_seconds(sum(self.phases.values()))}")
+        for name, sec in self.subphases.items():
+            lines.append(f"    of which {name}: {_fmt_seconds(sec)}")
+
+        if self.rib_points:
+            before = sum(b for b, _ in self.rib_points)
+            after = sum(a for _, a in self.rib_points)
+            sent = [a for _, a in self.rib_points]
+            ratio = before / after if after else 0.0
+            lines.append(
+                f"  {self.points_label}: {before} -> {after} ({ratio:.1f}x fewer); "
+                f"per rib min/mean/max {min(sent)}/{after / len(sent):.0f}/{max(sent)}"
+            )
+
+        if self.rib_deviation:
+            dev = self.rib_deviation
+            lines.append(
+                f"  max deviation (in): min/mean/max "
+                f"{min(dev):.4f}/{sum(dev) / len(dev):.4f}/{max(dev):.4f}"
+            )
+            over = self.ribs_over_tolerance()
+            if over:
+                names = ", ".join(f"Rib_{i + 1:02d}" for i in over)
+                lines.append(f"  over tolerance, fitted spline instead: {len(over)} ({names})")
+
+        for name, value in self.counts.items():
+            lines.append(f"  {name}: {value}")
+        return lines
+
+    def detail_lines(self):
+        lines = []
+        for i, (before, after) in enumerate(self.rib_points):
+            line = f"  Rib_{i + 1:02d}: {before} -> {after} {self.points_label}"
+            if i < len(self.rib_deviation):
+                line += f", max deviation {self.rib_deviation[i]:.4f} in"
+                if self.rib_tolerance is not None and self.rib_deviation[i] > self.rib_tolerance:
+                    line += " (over tolerance: fitted spline)"
+            lines.append(line)
+        return lines
+
+    def ribs_over_tolerance(self):
+        """Indices of ribs whose curve fit missed rib_tolerance."""
+        if self.rib_tolerance is None:
+            return []
+        return [i for i, d in enumerate(self.rib_deviation) if d > self.rib_tolerance]
+
+    def text(self, detail: bool = False) -> str:
+        lines = self.summary_lines()
+        if detail:
+            lines += self.detail_lines()
+        return "\n".join(lines)
@@ -0,0 +1,217 @@
+# src/flow_core/sampling.py
+#
+# Error-bounded adaptive sampling of rib profiles
+# -----------------------------------------------
+# Picks, per rib, the subset of the dense `samples` grid that is actually sent
+# to Fusion as spline fit points.
+#
+# The bound is on the spline through the kept points, not on the polyline:
+# Fusion fits a cubic through fit points, and with points this sparse that
+# cubic can swing well past tol between them even when the polyline doesn't.
+# Fusion's fit is modelled as a chord-length parametrised cubic with natural
+# ends, the usual interpolating spline for sketch fit points.
+#
+# 1. Start: a coarse uniform subset (every START_STRIDE-th sample).
+# 2. Refinement: the modelled spline is compared with every dense sample, and
+#    the worst offender in each interval that exceeds tol is inserted until
+#    none do. Points end up where the profile bends; flat runs stay sparse.
+#
+# How far the count drops depends on the profile. Default profiles carry
+# sample-to-sample jitter from the per-sample envelope shift, which a cubic
+# can only follow point by point (about 2x fewer points at tol 0.002 in);
+# smooth profiles (more smoothing passes, low randomness) drop 5-15x.
+
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+START_STRIDE = 32   # samples between the initial, uniformly spaced points
+NEWTON_STEPS = 2    # x -> curve parameter refinement steps per dense sample
+
+
+def adaptive_indices(xs, zs, tol: float):
+    """
+    Sorted indices into xs/zs (always including both ends) such that the
+    modelled fitted spline through them is within tol of every (xs[s], zs[s]).
+    """
+    n = len(xs)
+    if n <= 2:
+        return list(range(n))
+    start = sorted(set(range(0, n, START_STRIDE)) | {n - 1})
+    return refine_indices(xs, zs, start, tol)
+
+
+def adaptive_rows(prof, tol: float):
+    """adaptive_indices for every row of a RibProfiles."""
+    return [adaptive_indices(prof.xs, row, tol) for row in prof.heights]
+
+
+def refine_indices(xs, zs, idx, tol: float, candidates=None):
+    """
+    Add indices to idx (sorted, including both ends) until the modelled spline
+    through them is within tol of every dense sample. Only indices in
+    candidates (default: all) are added; if an offending interval has none
+    left to add, it stays as it is, so check spline_error when that matters.
+    """
+    idx = sorted(set(int(i) for i in idx))
+    if len(idx) >= len(xs):
+        return idx
+    tol = max(1e-9, float(tol))
+    if np is not None:
+        xs = np.asarray(xs, dtype=float)
+        zs = np.asarray(zs, dtype=float)
+        allowed = None
+        if candidates is not None:
+            allowed = np.zeros(len(xs), dtype=bool)
+            allowed[np.asarray(list(candidates), dtype=int)] = True
+        return _refine_numpy(xs, zs, np.asarray(idx), tol, allowed)
+    allowed = None if candidates is None else set(candidates)
+    return _refine_python([float(x) for x in xs], [float(z) for z in zs], idx, tol, allowed)
+
+
+def spline_error(xs, zs, idx):
+    """Vertical distance of each dense sample from the modelled spline through idx."""
+    idx = sorted(set(int(i) for i in idx))
+    if np is not None:
+        return _error_numpy(np.asarray(xs, dtype=float), np.asarray(zs, dtype=float), np.asarray(idx)).tolist()
+    return _error_python([float(x) for x in xs], [float(z) for z in zs], idx)[0]
+
+
+def _second_derivs(t, v):
+    """Natural cubic spline through (t[k], v[k]): second derivative at each knot."""
+    m = len(t)
+    if m < 3:
+        return [0.0] * m
+    # Tridiagonal system for the interior knots (Thomas algorithm)
+    cp = [0.0] * m
+    dp = [0.0] * m
+    for k in range(1, m - 1):
+        h0 = t[k] - t[k - 1]
+        h1 = t[k + 1] - t[k]
+        r = 6.0 * ((v[k + 1] - v[k]) / h1 - (v[k] - v[k - 1]) / h0)
+        den = 2.0 * (h0 + h1) - h0 * cp[k - 1]
+        cp[k] = h1 / den
+        dp[k] = (r - h0 * dp[k - 1]) / den
+    out = [0.0] * m
+    for k in range(m - 2, 0, -1):
+        out[k] = dp[k] - cp[k] * out[k + 1]
+    return out
+
+
+def _error_numpy(xs, zs, idx):
+    x = xs[idx]
+    z = zs[idx]
+    h = np.hypot(np.diff(x), np.diff(z))
+    t = np.concatenate(([0.0], np.cumsum(h)))
+    tl = t.tolist()
+    mx = np.asarray(_second_derivs(tl, x.tolist()))
+    mz = np.asarray(_second_derivs(tl, z.tolist()))
+
+    # Interval of each dense sample, and a first guess at its curve parameter
+    j = np.clip(np.searchsorted(idx, np.arange(len(xs)), side="right") - 1, 0, len(idx) - 2)
+    hj = h[j]
+    x0, x1, z0, z1 = x[j], x[j + 1], z[j], z[j + 1]
+    mx0, mx1, mz0, mz1 = mx[j], mx[j + 1], mz[j], mz[j + 1]
+    b = (xs - x0) / (x1 - x0)
+
+    for step in range(NEWTON_STEPS + 1):
+        a = 1.0 - b
+        cx = (a * a * a - a) * mx0 + (b * b * b - b) * mx1
+        px = a * x0 + b * x1 + cx * hj * hj / 6.0
+        dx = (x1 - x0) / hj + ((1.0 - 3.0 * a * a) * mx0 + (3.0 * b * b - 1.0) * mx1) * hj / 6.0
+        if step == NEWTON_STEPS:
+            break
+        with np.errstate(divide="ignore", invalid="ignore"):
+            b = np.clip(b + (xs - px) / (dx * hj), 0.0, 1.0)
+
+    cz = (a * a * a - a) * mz0 + (b * b * b - b) * mz1
+    pz = a * z0 + b * z1 + cz * hj * hj / 6.0
+    dz = (z1 - z0) / hj + ((1.0 - 3.0 * a * a) * mz0 + (3.0 * b * b - 1.0) * mz1) * hj / 6.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        err = np.abs(zs - (pz + dz / dx * (xs - px)))
+    # A spline that doubles back in x has no single height here
+    err[~(dx > 0.0)] = np.inf
+    err[idx] = 0.0
+    return err
+
+
+def _refine_numpy(xs, zs, idx, tol, allowed):
+    n = len(xs)
+    while True:
+        err = _error_numpy(xs, zs, idx)
+        bad = np.flatnonzero(err > tol)
+        if bad.size == 0:
+            return idx.tolist()
+
+        # Worst allowed sample in each offending interval (every sample is
+        # checked, only allowed ones are added)
+        interval = np.searchsorted(idx, np.arange(n), side="right") - 1
+        pick = np.isin(interval, interval[bad])
+        pick[idx] = False
+        if allowed is not None:
+            pick &= allowed
+        pick = np.flatnonzero(pick)
+        if pick.size == 0:
+            return idx.tolist()
+        order = np.lexsort((-err[pick], interval[pick]))
+        first = np.ones(order.size, dtype=bool)
+        first[1:] = interval[pick][order][1:] != interval[pick][order][:-1]
+        idx = np.union1d(idx, pick[order][first])
+
+
+def _error_python(xs, zs, idx):
+    """Per-sample error, and the interval each sample falls in."""
+    x = [xs[i] for i in idx]
+    z = [zs[i] for i in idx]
+    h = [math.hypot(x[k + 1] - x[k], z[k + 1] - z[k]) for k in range(len(idx) - 1)]
+    t = [0.0]
+    for hk in h:
+        t.append(t[-1] + hk)
+    mx = _second_derivs(t, x)
+    mz = _second_derivs(t, z)
+
+    err = [0.0] * len(xs)
+    where = [0] * len(xs)
+    for k in range(len(idx) - 1):
+        hk = h[k]
+        x0, x1, z0, z1 = x[k], x[k + 1], z[k], z[k + 1]
+        mx0, mx1, mz0, mz1 = mx[k], mx[k + 1], mz[k], mz[k + 1]
+        for s in range(idx[k] + 1, idx[k + 1]):
+            where[s] = k
+            b = (xs[s] - x0) / (x1 - x0)
+            for step in range(NEWTON_STEPS + 1):
+                a = 1.0 - b
+                px = a * x0 + b * x1 + ((a * a * a - a) * mx0 + (b * b * b - b) * mx1) * hk * hk / 6.0
+                dx = (x1 - x0) / hk + ((1.0 - 3.0 * a * a) * mx0 + (3.0 * b * b - 1.0) * mx1) * hk / 6.0
+                if step == NEWTON_STEPS or dx <= 0.0:
+                    break
+                b = min(1.0, max(0.0, b + (xs[s] - px) / (dx * hk)))
+            if not dx > 0.0:
+                err[s] = math.inf
+                continue
+            pz = a * z0 + b * z1 + ((a * a * a - a) * mz0 + (b * b * b - b) * mz1) * hk * hk / 6.0
+            dz = (z1 - z0) / hk + ((1.0 - 3.0 * a * a) * mz0 + (3.0 * b * b - 1.0) * mz1) * hk / 6.0
+            err[s] = abs(zs[s] - (pz + dz / dx * (xs[s] - px)))
+    return err, where
+
+
+def _refine_python(xs, zs, idx, tol, allowed):
+    while True:
+        err, where = _error_python(xs, zs, idx)
+        offending = {where[s] for s, e in enumerate(err) if e > tol}
+        if not offending:
+            return idx
+        kept = set(idx)
+        worst = {}
+        for s, e in enumerate(err):
+            k = where[s]
+            if k in offending and s not in kept and (allowed is None or s in allowed):
+                if k not in worst or e > err[worst[k]]:
+                    worst[k] = s
+        if not worst:
+            return idx
+        idx = sorted(kept.union(worst.values()))
@@ -0,0 +1,92 @@
+# src/flow_core/simplify.py
+#
+# Tolerance-bounded fit-point decimation (Douglas-Peucker)
+# --------------------------------------------------------
+# Runs after sampling and before splines.add: drops candidate points that the
+# chord between their neighbours already represents within tol.
+#
+# Unlike textbook Douglas-Peucker, a chord is accepted only if every *dense*
+# sample it spans (not just the surviving candidates) lies within tol of it,
+# so stacking this on top of adaptive sampling never compounds the error.
+#
+# Error is vertical (height at the same x), not perpendicular distance: on
+# steep ramps the perpendicular distance is much smaller than the height
+# error, and height is what gets cut.
+#
+# The chord pass only picks a starting set: the spline Fusion fits through
+# the kept points can still swing past tol between them. The same spline
+# refinement as adaptive sampling (sampling.refine_indices) then puts back
+# candidates until the modelled spline is within tol of every dense sample;
+# if the candidates run out first, the row is left undecimated.
+
+
+from flow_core import sampling
+
+
+def _chord_error(xs, zs, a: int, b: int) -> float:
+    """Max vertical distance of dense samples a..b from chord a-b."""
+    xa, za = xs[a], zs[a]
+    dx = xs[b] - xa
+    if dx == 0.0:
+        return 0.0
+    slope = (zs[b] - za) / dx
+    worst = 0.0
+    for s in range(a + 1, b):
+        d = abs(zs[s] - za - slope * (xs[s] - xa))
+        if d > worst:
+            worst = d
+    return worst
+
+
+def douglas_peucker(xs, zs, tol: float, candidates=None):
+    """
+    Subset of candidates (default: every index) whose fitted spline stays
+    within tol of every dense sample. Both ends are always kept.
+    """
+    n = len(xs)
+    cand = list(candidates) if candidates is not None else list(range(n))
+    if len(cand) <= 2:
+        return cand
+    xs = [float(x) for x in xs]
+    zs = [float(z) for z in zs]
+    tol = max(0.0, float(tol))
+
+    keep = [False] * len(cand)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(cand) - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo < 2:
+            continue
+        a, b = cand[lo], cand[hi]
+        if _chord_error(xs, zs, a, b) <= tol:
+            continue
+
+        # Split at the candidate farthest from the chord (vertically)
+        xa, za = xs[a], zs[a]
+        slope = (zs[b] - za) / (xs[b] - xa)
+        split, worst = lo + 1, -1.0
+        for k in range(lo + 1, hi):
+            s = cand[k]
+            d = abs(zs[s] - za - slope * (xs[s] - xa))
+            if d > worst:
+                split, worst = k, d
+        keep[split] = True
+        stack.append((lo, split))
+        stack.append((split, hi))
+
+    kept = [c for c, k in zip(cand, keep) if k]
+    kept = sampling.refine_indices(xs, zs, kept, tol, cand)
+    if max(sampling.spline_error(xs, zs, kept)) > tol:
+        return cand
+    return kept
+
+
+def decimate_rows(prof, tol: float, candidate_rows=None):
+    """douglas_peucker for every row of a RibProfiles."""
+    if candidate_rows is None:
+        candidate_rows = [None] * prof.rib_count
+    return [
+        douglas_peucker(prof.xs, row, tol, cand)
+        for row, cand in zip(prof.heights, candidate_rows)
+    ]
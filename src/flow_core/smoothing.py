@@ -0,0 +1,82 @@
+# src/flow_core/smoothing.py
+#
+# Closed-form profile smoothing
+# -----------------------------
+# `passes` rounds of the [0.25, 0.5, 0.25] filter with pinned endpoints (the
+# old util.smooth_series) equal a single convolution with the binomial kernel
+# C(2p, k) / 4**p, applied to the row extended by point (odd) reflection about
+# each endpoint. The odd extension is what keeps the endpoints fixed: the
+# filter is symmetric, so a row that is odd-symmetric about its end sample
+# stays that way and the end sample never moves.
+#
+# One kernel pass replaces `passes` list rebuilds, and the NumPy path does
+# every rib at once, so cost stays flat as passes and rib count grow.
+
+from math import comb
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def binomial_kernel(passes: int):
+    """Weights of width 2*passes + 1, summing to 1."""
+    n = 2 * passes
+    scale = 1.0 / (4 ** passes)
+    return [comb(n, k) * scale for k in range(n + 1)]
+
+
+def _odd_index(row, j: int) -> float:
+    """Value at index j of row's odd-reflected extension (any j)."""
+    last = len(row) - 1
+    if j < 0:
+        return 2.0 * row[0] - _odd_index(row, -j)
+    if j > last:
+        return 2.0 * row[last] - _odd_index(row, 2 * last - j)
+    return row[j]
+
+
+def smooth_row(row, passes: int):
+    """Smooths one profile (list of floats); endpoints stay pinned."""
+    passes = int(passes)
+    if passes <= 0 or len(row) < 3:
+        return list(row)
+
+    w = binomial_kernel(passes)
+    n = len(row)
+    ext = [_odd_index(row, j) for j in range(-passes, n + passes)]
+    out = [row[0]]
+    for s in range(1, n - 1):
+        window = ext[s:s + 2 * passes + 1]
+        out.append(sum(wk * v for wk, v in zip(w, window)))
+    out.append(row[-1])
+    return out
+
+
+def smooth_rows(heights, passes: int):
+    """
+    Smooths every rib at once. heights is a 2D NumPy array (smoothed copy
+    returned) or a list of rows (list of smoothed rows returned).
+    """
+    passes = int(passes)
+    if passes <= 0:
+        return heights
+    if np is None or not isinstance(heights, np.ndarray):
+        return [smooth_row(row, passes) for row in heights]
+
+    n = heights.shape[1]
+    if n < 3:
+        return heights.copy()
+
+    w = binomial_kernel(passes)
+    ext = np.pad(heights, ((0, 0), (passes, passes)), mode="reflect", reflect_type="odd")
+
+    # Symmetric kernel: pair the mirrored taps to halve the multiplies
+    out = w[passes] * ext[:, passes:passes + n]
+    for k in range(passes):
+        out += w[k] * (ext[:, k:k + n] + ext[:, 2 * passes - k:2 * passes - k + n])
+
+    out[:, 0] = heights[:, 0]
+    out[:, -1] = heights[:, -1]
+    return out
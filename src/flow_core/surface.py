@@ -0,0 +1,402 @@
+# src/flow_core/surface.py
+#
+# Flow surface term model
+# -----------------------
+# The relief carved into the ribs is a sum of independent terms over the
+# (rib, sample) grid, i.e. over y (across the stack) and x (along a rib):
+#
+#   rib wave     per-rib drifting sine + diagonal sweep (the original look)
+#   directional  one sine travelling along flow_angle, scaled by flow_strength
+#   secondary    broad cross-flow modulation, scaled by detail
+#   terrain      a few low-frequency waves in random directions, scaled by detail
+#   mass         optional Gaussian lump (use_mass, mass_strength)
+#
+# profiles.py multiplies the summed relief by the end envelope:
+#   z = rib_height - envelope * relief
+#
+# Each term evaluates over the whole grid in one vectorized pass (NumPy) or
+# row by row (pure Python). Terms whose weight is zero are never evaluated,
+# so disabled looks cost nothing.
+#
+# Term cache
+# ----------
+# Each term lists the parameters it reads (`keys`, plus the grid keys), and
+# its grid is cached under exactly those values. Moving one knob (say detail)
+# re-evaluates only the terms that read it; the rest come from the cache and
+# are just summed again. The cache is an LRU bounded by bytes, shared by
+# every model in the process (and by the envelope in profiles.py).
+
+import math
+from collections import OrderedDict
+
+from flow_core import rng
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Parameters that define the grid itself; every term depends on them
+GRID_KEYS = ("rib_count", "rib_length_in", "samples", "rib_pitch_in")
+
+# Upper bound for cached term grids (a 600 x 1200 grid is ~5.8 MB)
+CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+
+class Grid:
+    """
+    Sample positions for a block of ribs.
+
+    xs -- positions along the rib (inches), ys -- stack position of each rib
+    (inches). With NumPy, X is (1, n) and Y is (ribs, 1) for broadcasting.
+    """
+
+    def __init__(self, p: dict, ribs, span):
+        length = p["rib_length_in"]
+        samples = p["samples"]
+        pitch = p.get("rib_pitch_in", 0.0)
+        s0, s1 = span
+
+        self.ribs = ribs
+        self.span = span
+        if np is not None:
+            self.xs = (length * np.arange(s0, s1)) / samples
+            self.ys = np.arange(ribs.start, ribs.stop, ribs.step or 1) * pitch
+            self.X = self.xs[None, :]
+            self.Y = self.ys[:, None]
+        else:
+            self.xs = [length * s / samples for s in range(s0, s1)]
+            self.ys = [i * pitch for i in ribs]
+
+    @property
+    def shape(self):
+        return (len(self.ys), len(self.xs))
+
+    @property
+    def key(self):
+        """Identifies the block of the grid (rib range, sample span)."""
+        return (self.ribs, tuple(self.span))
+
+
+class TermCache:
+    """
+    Byte-bounded LRU of evaluated grids.
+
+    Values are treated as read-only: NumPy arrays are stored with
+    writeable=False, list rows must not be modified by callers.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # key -> (value, nbytes)
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, compute):
+        """Cached value for key, calling compute() on a miss."""
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+        self.misses += 1
+        value = compute()
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return value
+        if np is not None and isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        self._items[key] = (value, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, (_, old) = self._items.popitem(last=False)
+            self.nbytes -= old
+        return value
+
+    def clear(self):
+        self._items.clear()
+        self.nbytes = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.hits} hits, {self.misses} misses, "
+            f"{len(self._items)} grids / {self.nbytes / (1024 * 1024):.1f} MB"
+        )
+
+
+def _nbytes(value) -> int:
+    if np is not None and isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    # Python floats: 24-byte object + 8-byte list slot
+    return 32 * sum(len(row) for row in value)
+
+
+# Process-wide cache shared by the default model and the profile envelope
+CACHE = TermCache()
+
+
+def rib_t(p: dict, i: int) -> float:
+    """Normalized stack position of rib i in [0, 1]."""
+    return 0.0 if p["rib_count"] == 1 else (i / (p["rib_count"] - 1))
+
+
+def _uniform(seed: int, rib: int, purpose: int, lo: float, hi: float) -> float:
+    return lo + (hi - lo) * rng.uniform(seed, rib, purpose)
+
+
+def rib_params(p: dict, ribs=None):
+    """
+    Per-rib (amplitude, period, phase, bulge) tuples for the given rib
+    indices (all ribs by default).
+
+    Amplitude, period and phase drift with randomness; the bulge is a Gaussian
+    swell across the rib stack whose center/width come from the master stream.
+    Each value has its own counter-based stream, so a rib's parameters do not
+    depend on which other ribs were evaluated.
+    """
+    seed = p["seed"]
+    rib_count = p["rib_count"]
+    randomness = p["randomness"]
+    if ribs is None:
+        ribs = range(rib_count)
+
+    # Bulge profile across ribs (legacy topography feel)
+    if rib_count > 1:
+        center = (rib_count - 1) * (0.35 + 0.30 * rng.uniform(seed, rng.MASTER, rng.PURPOSE_CENTER))
+    else:
+        center = 0.0
+    sigma = max(1.0, rib_count * (0.14 + 0.10 * rng.uniform(seed, rng.MASTER, rng.PURPOSE_SIGMA)))
+
+    amp_var = 0.25
+    per_var = 0.30
+    phase_jitter = 0.25
+    bulge_strength = 0.35
+
+    out = []
+    for i in ribs:
+        Ai = p["base_amplitude_in"] * (1.0 + (amp_var * randomness) * _uniform(seed, i, rng.PURPOSE_AMP, -1.0, 1.0))
+        Pi = p["bend_scale_in"] * (1.0 + (per_var * randomness) * _uniform(seed, i, rng.PURPOSE_PERIOD, -1.0, 1.0))
+        Pi = max(3.0, Pi)
+
+        phi0 = _uniform(seed, i, rng.PURPOSE_PHASE, 0.0, 2.0 * math.pi) * (phase_jitter * randomness)
+
+        bulge = 1.0
+        if rib_count > 1:
+            d = (i - center) / sigma
+            bulge = 1.0 + bulge_strength * randomness * math.exp(-(d * d))
+
+        out.append((Ai, Pi, phi0, bulge))
+    return out
+
+
+def _wave_rows(grid: Grid, a: float, b: float, c: float, weight: float):
+    """weight * sin(a*x + b*y + c) over the grid."""
+    if np is not None:
+        # Separable: sin(u + v) = sin u cos v + cos u sin v, so only
+        # len(xs) + len(ys) sines instead of one per grid point
+        u = a * grid.xs
+        v = b * grid.ys + c
+        out = np.outer(weight * np.cos(v), np.sin(u))
+        out += np.outer(weight * np.sin(v), np.cos(u))
+        return out
+    return [[weight * math.sin(a * x + (b * y + c)) for x in grid.xs] for y in grid.ys]
+
+
+class Term:
+    """One additive relief component. Subclasses set name/keys and implement weight/evaluate."""
+
+    name = ""
+    keys = ()
+    grid_keys = GRID_KEYS
+
+    def cache_key(self, p: dict, grid: Grid):
+        return (self.name, tuple(p[k] for k in self.grid_keys + self.keys), grid.key)
+
+    def weight(self, p: dict) -> float:
+        return 1.0
+
+    def evaluate(self, p: dict, grid: Grid):
+        raise NotImplementedError
+
+
+class RibWaveTerm(Term):
+    name = "rib wave"
+    keys = ("seed", "base_amplitude_in", "bend_scale_in", "randomness", "wildness")
+    grid_keys = ("rib_count", "rib_length_in", "samples")  # per rib, not per y
+
+    def weight(self, p):
+        return p["base_amplitude_in"]
+
+    def evaluate(self, p, grid):
+        randomness = p["randomness"]
+        wildness = p["wildness"]
+        length = p["rib_length_in"]
+
+        # Coupling term that can sweep diagonally across ribs
+        diag_strength = (2.0 * math.pi) * (0.5 + 4.0 * wildness) * (0.25 + 0.75 * randomness)
+        params = rib_params(p, grid.ribs)
+
+        if np is not None:
+            rp = np.array(params).reshape(len(params), 4)
+            amp = (rp[:, 0] * rp[:, 3])[:, None]
+            period = rp[:, 1][:, None]
+            phi0 = rp[:, 2][:, None]
+            diag = (diag_strength * (np.array([rib_t(p, i) for i in grid.ribs]) - 0.5))[:, None]
+
+            arg = (2.0 * math.pi * grid.X) / period
+            arg += phi0
+            arg += diag * (grid.X / length)
+            np.sin(arg, out=arg)
+            arg *= amp
+            return arg
+
+        rows = []
+        for i, (Ai, Pi, phi0, bulge) in zip(grid.ribs, params):
+            diag_i = diag_strength * (rib_t(p, i) - 0.5)
+            amp = Ai * bulge
+            rows.append([
+                amp * math.sin((2.0 * math.pi * x / Pi) + phi0 + diag_i * (x / length))
+                for x in grid.xs
+            ])
+        return rows
+
+
+class DirectionalTerm(Term):
+    name = "directional"
+    keys = ("seed", "base_amplitude_in", "bend_scale_in", "flow_angle_rad", "flow_strength")
+
+    def weight(self, p):
+        return p["flow_strength"] * p["base_amplitude_in"]
+
+    def evaluate(self, p, grid):
+        k = 2.0 * math.pi / p["bend_scale_in"]
+        theta = p["flow_angle_rad"]
+        phase = 2.0 * math.pi * rng.uniform(p["seed"], rng.MASTER, rng.PURPOSE_FLOW)
+        return _wave_rows(grid, k * math.cos(theta), k * math.sin(theta), phase, self.weight(p))
+
+
+class SecondaryTerm(Term):
+    name = "secondary"
+    keys = ("seed", "base_amplitude_in", "bend_scale_in", "flow_angle_rad", "detail", "smoothness")
+
+    def weight(self, p):
+        return 0.5 * p["detail"] * (1.0 - 0.5 * p["smoothness"]) * p["base_amplitude_in"]
+
+    def evaluate(self, p, grid):
+        # Broad wave across the flow direction, itself modulated along it
+        u = rng.uniforms(p["seed"], rng.MASTER, rng.PURPOSE_SECONDARY, 2)
+        theta = p["flow_angle_rad"]
+        k_across = 2.0 * math.pi / (1.7 * p["bend_scale_in"])
+        k_along = 2.0 * math.pi / (2.3 * p["bend_scale_in"])
+        across = _wave_rows(grid, -k_across * math.sin(theta), k_across * math.cos(theta), 2.0 * math.pi * u[0], self.weight(p))
+        along = _wave_rows(grid, k_along * math.cos(theta), k_along * math.sin(theta), 2.0 * math.pi * u[1] + 0.5 * math.pi, 1.0)
+        if np is not None:
+            across *= along
+            return across
+        return [[a * b for a, b in zip(ra, rb)] for ra, rb in zip(across, along)]
+
+
+class TerrainTerm(Term):
+    name = "terrain"
+    keys = ("seed", "base_amplitude_in", "bend_scale_in", "flow_angle_rad", "detail", "smoothness", "wildness")
+    components = 3
+
+    def weight(self, p):
+        return 0.35 * p["detail"] * (1.0 - 0.5 * p["smoothness"]) * p["base_amplitude_in"]
+
+    def evaluate(self, p, grid):
+        # Low-frequency waves: directions spread around the flow angle by
+        # wildness, periods a little shorter than the bend scale
+        u = rng.uniforms(p["seed"], rng.MASTER, rng.PURPOSE_TERRAIN, 3 * self.components)
+        norm = sum(1.0 / (c + 1) for c in range(self.components))
+        total = None
+        for c in range(self.components):
+            ua, up, uf = u[3 * c:3 * c + 3]
+            angle = p["flow_angle_rad"] + (ua - 0.5) * math.pi * (0.25 + 0.75 * p["wildness"])
+            k = 2.0 * math.pi / (p["bend_scale_in"] * (0.45 + 0.35 * up))
+            w = self.weight(p) / ((c + 1) * norm)
+            wave = _wave_rows(grid, k * math.cos(angle), k * math.sin(angle), 2.0 * math.pi * uf, w)
+            if total is None:
+                total = wave
+            elif np is not None:
+                total += wave
+            else:
+                total = [[a + b for a, b in zip(ra, rb)] for ra, rb in zip(total, wave)]
+        return total
+
+
+class MassTerm(Term):
+    name = "mass"
+    keys = ("seed", "base_amplitude_in", "use_mass", "mass_strength")
+
+    def weight(self, p):
+        if not p["use_mass"]:
+            return 0.0
+        return 1.5 * p["mass_strength"] * p["base_amplitude_in"]
+
+    def evaluate(self, p, grid):
+        # Separable Gaussian lump; negative relief raises the surface
+        u = rng.uniforms(p["seed"], rng.MASTER, rng.PURPOSE_MASS, 4)
+        length = p["rib_length_in"]
+        depth = (p["rib_count"] - 1) * p.get("rib_pitch_in", 0.0)
+        cx = length * (0.3 + 0.4 * u[0])
+        cy = depth * (0.3 + 0.4 * u[1])
+        sx = length * (0.18 + 0.12 * u[2])
+        sy = max(p.get("rib_pitch_in", 0.0), depth * (0.18 + 0.12 * u[3]), 1e-6)
+        w = -self.weight(p)
+
+        if np is not None:
+            gx = np.exp(-0.5 * ((grid.X - cx) / sx) ** 2)
+            gy = np.exp(-0.5 * ((grid.Y - cy) / sy) ** 2)
+            return (w * gy) * gx
+        gx = [math.exp(-0.5 * ((x - cx) / sx) ** 2) for x in grid.xs]
+        return [[w * math.exp(-0.5 * ((y - cy) / sy) ** 2) * g for g in gx] for y in grid.ys]
+
+
+class SurfaceModel:
+    """
+    An ordered set of terms whose sum is the relief. With a cache, each
+    term's grid is reused until one of the parameters it reads changes.
+    """
+
+    def __init__(self, terms, cache=None):
+        self.terms = list(terms)
+        self.cache = cache
+
+    def active_terms(self, p: dict):
+        return [t for t in self.terms if t.weight(p) != 0.0]
+
+    def term_grid(self, term: Term, p: dict, grid: Grid):
+        if self.cache is None:
+            return term.evaluate(p, grid)
+        return self.cache.get(term.cache_key(p, grid), lambda: term.evaluate(p, grid))
+
+    def relief(self, p: dict, grid: Grid):
+        """Summed relief over the grid: new (ribs, n) array, or list of rows."""
+        rows, cols = grid.shape
+        if np is not None:
+            total = np.zeros((rows, cols))
+            for term in self.active_terms(p):
+                total += self.term_grid(term, p, grid)
+            return total
+
+        total = [[0.0] * cols for _ in range(rows)]
+        for term in self.active_terms(p):
+            for acc, row in zip(total, self.term_grid(term, p, grid)):
+                for s, v in enumerate(row):
+                    acc[s] += v
+        return total
+
+
+DEFAULT_MODEL = SurfaceModel([
+    RibWaveTerm(),
+    DirectionalTerm(),
+    SecondaryTerm(),
+    TerrainTerm(),
+    MassTerm(),
+], cache=CACHE)
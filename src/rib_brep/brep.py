@@ -0,0 +1,157 @@
+# src/rib_brep/brep.py
+#
+# Direct B-rep rib bodies
+# -----------------------
+# Alternate rib builder for final builds: instead of sketch -> profile
+# detection -> extrude, each rib solid is assembled straight from the
+# computed outline and handed to Fusion as one transient body.
+#
+# The temporary B-rep API has wires, planar faces and ruled surfaces but no
+# extrude, so the prism is described face by face with BRepBodyDefinition:
+#   - front / back faces: planes at y = 0 and y = thickness
+#   - one planar side face per straight outline segment
+#   - the top face: ruled surface between the front and back copies of the
+#     least-squares top curve (TemporaryBRepManager.createRuledSurface)
+#
+# Placement matches the legacy sketch on the XZ plane: sketch (x, y) maps to
+# model (x, 0, -y) and the extrusion runs along +Y, so a B-rep rib occupies
+# exactly the space the sketch + extrude rib did.
+
+import adsk.core
+import adsk.fusion
+from util import cm
+
+
+def _model_point(x_in: float, z_in: float, y_in: float = 0.0):
+    return adsk.core.Point3D.create(cm(x_in), cm(y_in), -cm(z_in))
+
+
+def _distinct(pts):
+    """Drops consecutive duplicates (including last == first)."""
+    out = []
+    for pt in pts:
+        if not out or pt != out[-1]:
+            out.append(pt)
+    while len(out) > 1 and out[-1] == out[0]:
+        out.pop()
+    return out
+
+
+def _top_curve(fit, y_in: float):
+    ctrl = [_model_point(x, z, y_in) for x, z in zip(fit.ctrl_xs, fit.ctrl_zs)]
+    return adsk.core.NurbsCurve3D.createNonRational(ctrl, fit.degree, fit.knots, False)
+
+
+def _ruled_top(tbm, front, back):
+    """Ruled surface between the two top curves and whether its normal points inward."""
+    wire_f, _ = tbm.createWireFromCurves([front], False)
+    wire_b, _ = tbm.createWireFromCurves([back], False)
+    ruled = tbm.createRuledSurface(wire_f.wires.item(0), wire_b.wires.item(0))
+    surface = ruled.faces.item(0).geometry
+
+    # The top face's outward side is sketch-up, i.e. model -Z
+    box = surface.evaluator.parametricRange()
+    mid = adsk.core.Point2D.create(
+        0.5 * (box.minPoint.x + box.maxPoint.x),
+        0.5 * (box.minPoint.y + box.maxPoint.y),
+    )
+    ok, normal = surface.evaluator.getNormalAtParameter(mid)
+    return surface, bool(ok and normal.z > 0.0)
+
+
+def rib_body(fit, outline_pts, thickness_in: float):
+    """
+    Transient solid for one rib: the closed outline (top curve `fit`, a
+    flow_core.bspline.CurveFit, plus outline.closing_outline() points)
+    extruded by thickness_in along +Y.
+
+    Returns a BRepBody, or None if Fusion rejects the definition.
+    """
+    try:
+        return _rib_body(fit, outline_pts, thickness_in)
+    except RuntimeError:
+        return None
+
+
+def _rib_body(fit, outline_pts, thickness_in: float):
+    tbm = adsk.fusion.TemporaryBRepManager.get()
+
+    # Loop vertices: (0, z_left) -> top curve -> (L, z_right) -> straight segments
+    verts = _distinct([outline_pts[-1]] + list(outline_pts[:-1]))
+    n = len(verts)
+    if n < 3:
+        return None
+
+    bd = adsk.fusion.BRepBodyDefinition.create()
+    shell = bd.lumpDefinitions.add().shellDefinitions.add()
+
+    vf = [bd.createVertexDefinition(_model_point(x, z, 0.0)) for x, z in verts]
+    vb = [bd.createVertexDefinition(_model_point(x, z, thickness_in)) for x, z in verts]
+
+    top_f = _top_curve(fit, 0.0)
+    top_b = _top_curve(fit, thickness_in)
+
+    def outline_edges(v, top):
+        edges = [bd.createEdgeDefinitionByCurve(v[0], v[1], top)]
+        for k in range(1, n):
+            a, b = v[k], v[(k + 1) % n]
+            edges.append(bd.createEdgeDefinitionByCurve(a, b, adsk.core.Line3D.create(a.position, b.position)))
+        return edges
+
+    ef = outline_edges(vf, top_f)
+    eb = outline_edges(vb, top_b)
+    el = [
+        bd.createEdgeDefinitionByCurve(a, b, adsk.core.Line3D.create(a.position, b.position))
+        for a, b in zip(vf, vb)
+    ]
+
+    def add_face(surface, coedges, param_reversed=False):
+        loop = shell.faceDefinitions.add(surface, param_reversed).loopDefinitions.add()
+        for edge, opposed in coedges:
+            loop.bRepCoEdgeDefinitions.add(edge, opposed)
+
+    # Outline runs clockwise seen from +Y: front face (normal -Y) follows
+    # it, back face (normal +Y) runs it backwards
+    y_axis = adsk.core.Vector3D.create(0, 1, 0)
+    add_face(adsk.core.Plane.create(vf[0].position, adsk.core.Vector3D.create(0, -1, 0)), [(e, False) for e in ef])
+    add_face(adsk.core.Plane.create(vb[0].position, y_axis), [(e, True) for e in reversed(eb)])
+
+    for k in range(n):
+        k1 = (k + 1) % n
+        coedges = [(el[k], False), (eb[k], False), (el[k1], True), (ef[k], True)]
+        if k == 0:
+            surface, inward = _ruled_top(tbm, top_f, top_b)
+            add_face(surface, coedges, inward)
+        else:
+            # Outward normal of a side face: +Y x segment direction
+            d = vf[k].position.vectorTo(vf[k1].position)
+            normal = y_axis.crossProduct(d)
+            normal.normalize()
+            add_face(adsk.core.Plane.create(vf[k].position, normal), coedges)
+
+    return bd.createBody()
+
+
+def add_bodies(comp: adsk.fusion.Component, bodies, names=None) -> None:
+    """
+    Adds transient bodies to comp, optionally naming them. Parametric
+    designs need a base feature to own them; all bodies go into one, with a
+    single edit session.
+    """
+    def add_all(base=None):
+        for k, body in enumerate(bodies):
+            added = comp.bRepBodies.add(body, base) if base is not None else comp.bRepBodies.add(body)
+            if names is not None:
+                added.name = names[k]
+
+    design = comp.parentDesign
+    if design.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+        add_all()
+        return
+
+    base = comp.features.baseFeatures.add()
+    base.startEdit()
+    try:
+        add_all(base)
+    finally:
+        base.finishEdit()
@@ -0,0 +1,75 @@
+# tests/conftest.py
+# Shared fixtures for the flow_core tests (headless: no Fusion, no adsk)
+
+import importlib
+import math
+import os
+import sys
+
+import pytest
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_ROOT, "src"))
+sys.path.insert(0, _ROOT)  # config.py (no adsk imports)
+
+from flow_core import profiles, surface  # noqa: E402
+
+_NUMPY_MODULES = (
+    "bspline", "dedupe", "mesh", "profiles", "rng", "sampling", "simplify", "smoothing", "surface",
+)
+
+
+def make_params(**overrides):
+    """profile_params() with the dialog defaults, small enough to run fast."""
+    p = dict(
+        seed=12345,
+        rib_count=12,
+        rib_length_in=48.0,
+        rib_height_in=4.0,
+        randomness=0.35,
+        wildness=0.25,
+        smoothness=0.80,
+        base_amplitude_in=1.10,
+        bend_scale_in=72.0,
+        samples=240,
+        smooth_passes=2,
+        flow_angle_rad=math.radians(18.0),
+        flow_strength=0.55,
+        detail=0.35,
+        use_mass=True,
+        mass_strength=0.25,
+        rib_pitch_in=1.75,
+    )
+    p.update(overrides)
+    return profiles.profile_params(**p)
+
+
+@pytest.fixture
+def params():
+    return make_params()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches():
+    surface.CACHE.clear()
+    profiles.forget_profiles()
+    yield
+    surface.CACHE.clear()
+    profiles.forget_profiles()
+
+
+@pytest.fixture
+def no_numpy(monkeypatch):
+    """Runs the test on the pure-Python paths (as if NumPy were missing)."""
+    for name in _NUMPY_MODULES:
+        module = importlib.import_module("flow_core." + name)
+        if hasattr(module, "np"):
+            monkeypatch.setattr(module, "np", None)
+    surface.CACHE.clear()
+    yield
+    surface.CACHE.clear()
+
+
+def rows(heights):
+    """Heights as a list of lists of floats, from either path."""
+    return [[float(v) for v in row] for row in heights]
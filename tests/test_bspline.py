@@ -0,0 +1,32 @@
+# tests/test_bspline.py
+# NURBS fitting: the default cap meets the tolerance; misses are flagged
+
+import config
+from flow_core import bspline, profiles
+from flow_core.report import RunReport
+from conftest import make_params
+
+TOL = config.DEFAULTS_QUALITY["sample_tolerance_in"]
+
+
+def test_ladder_cap_is_clamped_to_seven_eighths_of_the_samples():
+    assert bspline.control_ladder(400, 421)[-1] == 368
+    assert bspline.control_ladder(None, 421)[-1] == 368
+    assert bspline.control_ladder(64, 421) == [8, 16, 32, 64]
+
+
+def test_default_cap_meets_tolerance_on_default_profiles():
+    p = make_params(rib_count=8, samples=config.DEFAULTS_QUALITY["samples"], use_mass=False)
+    prof = profiles.compute_profiles(p)
+    cap = config.DEFAULTS_QUALITY["nurbs_max_control_points"]
+    assert all(f.max_dev <= TOL for f in bspline.fit_profiles(prof, TOL, cap))
+
+
+def test_report_flags_ribs_over_tolerance():
+    report = RunReport()
+    report.rib_points = [(421, 64)] * 3
+    report.rib_deviation = [0.001, 0.07, 0.002]
+    report.rib_tolerance = TOL
+    assert report.ribs_over_tolerance() == [1]
+    assert "over tolerance, fitted spline instead: 1 (Rib_02)" in report.text()
+    assert "(over tolerance: fitted spline)" in report.detail_lines()[1]
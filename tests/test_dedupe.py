@@ -0,0 +1,63 @@
+# tests/test_dedupe.py
+# Profile reuse: max-abs-difference matching, bin edges, reversed rows
+
+import pytest
+
+from flow_core import dedupe, profiles
+from conftest import make_params
+
+TOL = 0.002
+
+
+def _prof(heights):
+    return profiles.RibProfiles(list(range(len(heights[0]))), heights)
+
+
+def _base(n=60):
+    return [0.5 + 0.01 * s + (0.2 if s % 7 == 0 else 0.0) for s in range(n)]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def path(request):
+    if request.param == "python":
+        request.getfixturevalue("no_numpy")
+    return request.param
+
+
+def test_rows_across_a_bin_edge_match(path):
+    # Quantized to TOL these land in different bins: 0.00099 -> 0, 0.0011 -> 1
+    a = [z + 0.00099 for z in _base()]
+    b = [z + 0.0011 for z in _base()]
+    assert dedupe.profile_key(a, TOL) != dedupe.profile_key(b, TOL)
+    assert dedupe.canonical_ribs(_prof([a, b]), TOL) == [(0, False), (0, False)]
+
+
+def test_reversed_rows_match(path):
+    a = _base()
+    b = [z + 0.0015 for z in reversed(a)]
+    assert dedupe.canonical_ribs(_prof([a, b]), TOL) == [(0, False), (0, True)]
+    assert dedupe.canonical_ribs(_prof([a, b]), TOL, mirrored=False) == [(0, False), (1, False)]
+
+
+def test_rows_beyond_tolerance_stay_separate(path):
+    a = _base()
+    b = list(a)
+    b[30] += 0.0021   # one sample out of tolerance, same mean within tol
+    c = [z + 0.01 for z in a]
+    assert dedupe.canonical_ribs(_prof([a, b, c]), TOL) == [(0, False), (1, False), (2, False)]
+
+
+def test_matches_are_against_built_rows(path):
+    # b is within tol of a, c within tol of b but not of a: c is built
+    a = _base()
+    b = [z + 0.0015 for z in a]
+    c = [z + 0.003 for z in a]
+    assert dedupe.canonical_ribs(_prof([a, b, c]), TOL) == [(0, False), (0, False), (2, False)]
+
+
+def test_symmetric_stack_reuses_mirrored_half():
+    p = make_params(rib_count=6)
+    rows = [list(map(float, r)) for r in profiles.compute_profiles(p).heights[:3]]
+    stack = rows + [list(reversed(r)) for r in rows]
+    got = dedupe.canonical_ribs(_prof(stack), TOL)
+    assert got[3:] == [(0, True), (1, True), (2, True)]
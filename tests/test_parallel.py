@@ -0,0 +1,47 @@
+# tests/test_parallel.py
+# Process-pool profiles: bit-identical to serial, and the deadline fallback
+
+import pytest
+
+from flow_core import parallel, profiles
+from conftest import make_params, rows
+
+
+@pytest.fixture
+def forced_pool(monkeypatch):
+    """Lets small runs through worth_parallel so the pool is exercised."""
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_RIBS", 1)
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_CELLS", 0)
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_CELLS_NUMPY", 0)
+    yield
+    parallel.shutdown(kill=True)
+
+
+def test_rib_ranges_cover_stack():
+    for count, chunks in ((1, 4), (10, 3), (48, 16), (7, 7)):
+        ranges = parallel.rib_ranges(count, chunks)
+        assert ranges[0][0] == 0 and ranges[-1][1] == count
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+def test_small_runs_stay_serial():
+    # With NumPy the serial path wins across the whole LIMITS range
+    assert parallel.worth_parallel(make_params(rib_count=600, samples=1200), 8) == (parallel.np is None)
+    assert not parallel.worth_parallel(make_params(rib_count=40, samples=1200), 8)
+    assert not parallel.worth_parallel(make_params(rib_count=600, samples=1200), 1)
+
+
+def test_pool_matches_serial(forced_pool):
+    p = make_params(rib_count=20, samples=120)
+    serial = rows(profiles.compute_profiles(p).heights)
+    pooled = rows(parallel.compute_profiles_parallel(p, workers=2).heights)
+    assert parallel._pool is not None  # really went through the pool
+    assert pooled == serial
+
+
+def test_missed_deadline_falls_back_to_serial(forced_pool, monkeypatch):
+    monkeypatch.setattr(parallel, "result_timeout", lambda p: 0.0)
+    p = make_params(rib_count=20, samples=120)
+    got = rows(parallel.compute_profiles_parallel(p, workers=2).heights)
+    assert got == rows(profiles.compute_profiles(p).heights)
+    assert parallel._pool is None
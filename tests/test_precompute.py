@@ -0,0 +1,36 @@
+# tests/test_precompute.py
+# Background profiles: published for the newest inputs, then on_published
+
+import threading
+
+from flow_core import precompute, profiles
+from conftest import make_params
+
+
+def test_publish_fires_callback_without_waiting():
+    job = precompute.ProfilePrecompute(debounce_s=0.0)
+    ready = threading.Event()
+    job.on_published = ready.set
+    p = make_params()
+    try:
+        job.submit(p)
+        assert ready.wait(30.0)
+        assert profiles.remembered(p) is not None
+        assert job.wait(p)
+    finally:
+        job.shutdown()
+
+
+def test_newest_submission_wins():
+    job = precompute.ProfilePrecompute(debounce_s=0.2)
+    ready = threading.Event()
+    job.on_published = ready.set
+    old, new = make_params(seed=1), make_params(seed=2)
+    try:
+        job.submit(old)
+        job.submit(new)
+        assert ready.wait(30.0)
+        assert profiles.remembered(new) is not None
+        assert profiles.remembered(old) is None
+    finally:
+        job.shutdown()
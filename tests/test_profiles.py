@@ -0,0 +1,53 @@
+# tests/test_profiles.py
+# NumPy vs pure-Python profiles, and rib / span subsets vs a full run
+
+import pytest
+
+from flow_core import profiles, rng
+from conftest import make_params, rows
+
+np = pytest.importorskip("numpy")
+
+
+def _python_heights(p, request, **kw):
+    request.getfixturevalue("no_numpy")
+    return rows(profiles.compute_profiles(p, **kw).heights)
+
+
+@pytest.mark.parametrize("smooth_passes", [0, 3])
+def test_numpy_matches_python(smooth_passes, request):
+    p = make_params(smooth_passes=smooth_passes)
+    fast = profiles.compute_profiles(p)
+    assert isinstance(fast.heights, np.ndarray)
+    slow = _python_heights(p, request)
+    assert np.max(np.abs(fast.heights - np.array(slow))) < 1e-12
+
+
+def test_rng_paths_identical():
+    lists = [rng.uniforms(7, i, 3, 50, start=10) for i in range(4)]
+    array = rng.uniforms_array(7, range(4), 3, 50, start=10)
+    assert array.tolist() == lists
+
+
+@pytest.mark.parametrize("ribs, span", [
+    (range(3, 8), None),
+    (None, (0, 17)),
+    (None, (100, 241)),
+    (range(5, 6), (37, 90)),
+])
+def test_subset_matches_full_run(ribs, span):
+    p = make_params(smooth_passes=4)
+    full = profiles.compute_profiles(p).heights
+    part = profiles.compute_profiles(p, ribs=ribs, span=span)
+    r = ribs if ribs is not None else range(p["rib_count"])
+    s0, s1 = span if span is not None else (0, p["samples"] + 1)
+    np.testing.assert_array_equal(part.heights, full[r.start:r.stop, s0:s1])
+    np.testing.assert_array_equal(part.xs, profiles.sample_xs(p)[s0:s1])
+
+
+def test_subset_matches_full_run_python(no_numpy):
+    p = make_params(smooth_passes=4)
+    full = profiles.compute_profiles(p).heights
+    part = profiles.compute_profiles(p, ribs=range(2, 5), span=(30, 61))
+    assert part.heights == [row[30:61] for row in full[2:5]]
+
@@ -0,0 +1,84 @@
+# tests/test_sampling.py
+# Adaptive fit points: the spline through the kept points stays within tol
+
+import numpy as np
+import pytest
+
+from flow_core import profiles, sampling
+from conftest import make_params
+
+TOL = 0.002
+
+
+@pytest.fixture(params=["numpy", "python"])
+def path(request):
+    if request.param == "python":
+        request.getfixturevalue("no_numpy")
+    return request.param
+
+
+def _natural(t, v):
+    """Natural cubic spline second derivatives, dense solve (reference)."""
+    m = len(t)
+    h = np.diff(t)
+    a = np.zeros((m, m))
+    r = np.zeros(m)
+    a[0, 0] = a[-1, -1] = 1.0
+    for k in range(1, m - 1):
+        a[k, k - 1], a[k, k], a[k, k + 1] = h[k - 1], 2.0 * (h[k - 1] + h[k]), h[k]
+        r[k] = 6.0 * ((v[k + 1] - v[k]) / h[k] - (v[k] - v[k - 1]) / h[k - 1])
+    return np.linalg.solve(a, r)
+
+
+def _reference_error(xs, zs, idx):
+    """Chord-length natural cubic through the kept points, traced densely."""
+    xs, zs = np.asarray(xs, dtype=float), np.asarray(zs, dtype=float)
+    x, z = xs[idx], zs[idx]
+    t = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(z)))))
+    mx, mz = _natural(t, x), _natural(t, z)
+    tq = np.linspace(0.0, t[-1], 100_000)
+    j = np.clip(np.searchsorted(t, tq, side="right") - 1, 0, len(t) - 2)
+    h = t[j + 1] - t[j]
+    b = (tq - t[j]) / h
+    a = 1.0 - b
+
+    def ev(v, mv):
+        return a * v[j] + b * v[j + 1] + ((a ** 3 - a) * mv[j] + (b ** 3 - b) * mv[j + 1]) * h * h / 6.0
+
+    cx, cz = ev(x, mx), ev(z, mz)
+    assert np.all(np.diff(cx) > 0.0)
+    return float(np.max(np.abs(np.interp(xs, cx, cz) - zs)))
+
+
+def _profiles(**overrides):
+    return profiles.compute_profiles(make_params(rib_count=6, samples=420, use_mass=False, **overrides))
+
+
+def test_spline_through_kept_points_is_within_tol(path):
+    prof = _profiles()
+    for row, idx in zip(prof.heights, sampling.adaptive_rows(prof, TOL)):
+        assert idx[0] == 0 and idx[-1] == len(prof.xs) - 1
+        assert max(sampling.spline_error(prof.xs, row, idx)) <= TOL
+        # Small slack: the reference traces the curve at finite resolution
+        assert _reference_error(prof.xs, row, idx) <= TOL * 1.01
+
+
+def test_numpy_and_python_pick_the_same_points(monkeypatch):
+    prof = _profiles()
+    fast = sampling.adaptive_rows(prof, TOL)
+    monkeypatch.setattr(sampling, "np", None)
+    assert sampling.adaptive_rows(prof, TOL) == fast
+
+
+def test_smooth_profiles_need_far_fewer_points():
+    prof = _profiles(randomness=0.0, wildness=0.0)
+    n = len(prof.xs)
+    for idx in sampling.adaptive_rows(prof, TOL):
+        assert len(idx) * 5 <= n
+
+
+def test_refine_only_adds_candidates(path):
+    prof = _profiles()
+    cands = list(range(0, len(prof.xs), 2)) + [len(prof.xs) - 1]
+    idx = sampling.refine_indices(prof.xs, prof.heights[0], [0, len(prof.xs) - 1], TOL, cands)
+    assert set(idx) <= set(cands)
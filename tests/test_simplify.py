@@ -0,0 +1,43 @@
+# tests/test_simplify.py
+# Fit-point decimation: spline-bounded, candidates only, same on both paths
+
+import pytest
+
+from flow_core import profiles, sampling, simplify
+from conftest import make_params
+
+TOL = 0.002
+
+
+@pytest.fixture(params=["numpy", "python"])
+def path(request):
+    if request.param == "python":
+        request.getfixturevalue("no_numpy")
+    return request.param
+
+
+def _profiles():
+    return profiles.compute_profiles(make_params(rib_count=6, samples=420, use_mass=False))
+
+
+def test_decimated_spline_is_within_tol(path):
+    prof = _profiles()
+    for row, idx in zip(prof.heights, simplify.decimate_rows(prof, TOL)):
+        assert idx[0] == 0 and idx[-1] == len(prof.xs) - 1
+        assert max(sampling.spline_error(prof.xs, row, idx)) <= TOL
+
+
+def test_decimation_keeps_a_subset_of_the_adaptive_points(path):
+    prof = _profiles()
+    cands = sampling.adaptive_rows(prof, TOL)
+    for row, c, idx in zip(prof.heights, cands, simplify.decimate_rows(prof, TOL, cands)):
+        assert set(idx) <= set(c)
+        assert len(idx) <= len(c)
+        assert max(sampling.spline_error(prof.xs, row, idx)) <= TOL
+
+
+def test_numpy_and_python_keep_the_same_points(monkeypatch):
+    prof = _profiles()
+    fast = simplify.decimate_rows(prof, TOL)
+    monkeypatch.setattr(sampling, "np", None)
+    assert simplify.decimate_rows(prof, TOL) == fast
@@ -0,0 +1,48 @@
+# tests/test_smoothing.py
+# Closed-form binomial smoothing vs the iterative [0.25, 0.5, 0.25] filter
+
+import random
+
+import pytest
+
+from flow_core import smoothing
+
+
+def _iterative(row, passes):
+    """The old util.smooth_series: pinned ends, one 3-tap pass at a time."""
+    out = list(row)
+    for _ in range(passes):
+        out = [out[0]] + [
+            0.25 * out[s - 1] + 0.5 * out[s] + 0.25 * out[s + 1]
+            for s in range(1, len(out) - 1)
+        ] + [out[-1]]
+    return out
+
+
+def _row(n, seed):
+    r = random.Random(seed)
+    return [r.uniform(-2.0, 2.0) for _ in range(n)]
+
+
+@pytest.mark.parametrize("n", [3, 4, 7, 50, 301])
+@pytest.mark.parametrize("passes", [1, 2, 5, 12])
+def test_kernel_matches_iterative_filter(n, passes):
+    row = _row(n, n * 100 + passes)
+    got = smoothing.smooth_row(row, passes)
+    want = _iterative(row, passes)
+    assert got[0] == row[0] and got[-1] == row[-1]
+    assert max(abs(a - b) for a, b in zip(got, want)) < 1e-12
+
+
+@pytest.mark.parametrize("passes", [0, 1, 6])
+def test_numpy_rows_match_python_rows(passes):
+    np = pytest.importorskip("numpy")
+    grid = [_row(120, k) for k in range(5)]
+    fast = smoothing.smooth_rows(np.array(grid), passes)
+    slow = smoothing.smooth_rows(grid, passes)
+    assert np.max(np.abs(np.asarray(fast) - np.array(slow))) < 1e-12
+
+
+def test_kernel_sums_to_one():
+    for passes in range(1, 20):
+        assert abs(sum(smoothing.binomial_kernel(passes)) - 1.0) < 1e-15
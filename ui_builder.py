@@ -9,6 +9,9 @@ import config
 import presets
 from util import set_tip
 
+# Fired from the profile worker thread when background profiles are ready
+PROFILES_READY_EVENT = "OrganicFlowRibs_profilesReady"
+
 
 def register_command(ui, handlers, generator_module):
     """
@@ -114,18 +117,27 @@ class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             set_tip(rib_t, "Plywood thickness (extrusion distance)", "Measure your sheet if you want a perfect press-fit slot.")
 
             gap = main.addValueInput(
-                "gapBetweenRibs", "Gap between ribs (preview)", "in",
+                "gapBetweenRibs", "Gap between ribs", "in",
                 adsk.core.ValueInput.createByString(f'{d_main["gap_between_ribs_in"]} in')
             )
             set_tip(
                 gap,
-                "Spacing between ribs for the wall-preview layout",
-                "Does not affect cut geometry.\nOnly spreads ribs so you can see assembled look."
+                "Spacing between ribs in the assembled stack",
+                "Spreads ribs in the layout and sets where each rib slices the flow surface\n"
+                "(directional, secondary, terrain and mass terms vary across the stack)."
             )
 
             layout_y = main.addBoolValueInput("layoutAlongY", "Layout along Y (stack depth)", True, "", d_main["layout_along_y"])
             set_tip(layout_y, "If ON: ribs are spaced along Y. If OFF: along X", "ON is best for stacked sculpture preview.")
 
+            single = main.addBoolValueInput("singleComponent", "All ribs in one component", True, "", d_main["single_component"])
+            set_tip(
+                single,
+                "Ribs become bodies Rib_01, Rib_02, ... in one Ribs component",
+                "Much lighter browser, saves and transforms for hundreds of ribs.\n"
+                "Bodies are placed by moves; each can still be exported on its own."
+            )
+
             # ----------------------------
             # FLOW
             # ----------------------------
@@ -269,7 +281,112 @@ class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             set_tip(
                 smooth_passes,
                 "Post-smoothing on Z values",
-                "Runs a small moving-average filter across the profile.\nTry 2–4 if your curve looks faceted."
+                "Runs a binomial (repeated moving-average) filter across every profile; ends stay pinned.\nTry 2–4 if your curve looks faceted."
+            )
+
+            adaptive = qual.addBoolValueInput("adaptiveSampling", "Adaptive fit points", True, "", d_q["adaptive_sampling"])
+            set_tip(
+                adaptive,
+                "Place spline fit points by curvature",
+                "Keeps only the samples the spline needs to stay within the fit tolerance of\nevery computed sample. Flat runs get few points, tight bends get many.\nSmooth profiles need far fewer points; jittery ones about half."
+            )
+
+            sample_tol = qual.addValueInput(
+                "sampleTolerance", "Fit tolerance", "in",
+                adsk.core.ValueInput.createByString(f'{d_q["sample_tolerance_in"]} in')
+            )
+            set_tip(
+                sample_tol,
+                "Maximum deviation from the computed profile",
+                "Used by adaptive fit points and decimation.\n0.002 in is well below what a CNC router can cut."
+            )
+
+            decimate = qual.addBoolValueInput("decimatePoints", "Decimate fit points", True, "", d_q["decimate_points"])
+            set_tip(
+                decimate,
+                "Drop fit points on nearly straight runs",
+                "Douglas-Peucker pass before the spline is created, then points the spline\nneeds are put back: every computed sample stays within the fit tolerance\n(in height) of the spline through the kept points."
+            )
+
+            nurbs = qual.addBoolValueInput("nurbsCurves", "NURBS curves (least-squares fit)", True, "", d_q["nurbs_curves"])
+            set_tip(
+                nurbs,
+                "Create each rib's top edge directly from control points",
+                "Fits a cubic B-spline to the profile and adds it as a fixed spline.\n"
+                "No fit-point solve in Fusion; fewer, smoother curves for CAM.\nMax deviation per rib is in the run report; a rib that misses the fit tolerance\nat the cap gets a fitted spline through its samples instead, and is flagged there."
+            )
+
+            nurbs_max = qual.addIntegerSpinnerCommandInput(
+                "nurbsMaxControlPoints",
+                "Max control points",
+                config.LIMITS["nurbs_max_control_points"][0],
+                config.LIMITS["nurbs_max_control_points"][1],
+                4,
+                d_q["nurbs_max_control_points"]
+            )
+            set_tip(
+                nurbs_max,
+                "Upper bound on NURBS control points per rib",
+                "Each rib uses the fewest points (8, 16, 32, ...) that meet the fit tolerance, up to this cap\n(and at most 7/8 of the spline samples). Default profiles need most of that."
+            )
+
+            defer = qual.addBoolValueInput("deferSketchCompute", "Defer sketch compute", True, "", d_q["defer_sketch_compute"])
+            set_tip(
+                defer,
+                "Solve each sketch once, after all its curves are added",
+                "Rib and backer pocket sketches otherwise re-solve after every line.\nTurn off only to compare timings in the run report."
+            )
+
+            brep_ribs = qual.addBoolValueInput("brepRibs", "Direct B-rep rib bodies", True, "", d_q["brep_ribs"])
+            set_tip(
+                brep_ribs,
+                "Create rib solids directly, without rib sketches or extrudes",
+                "For final builds: faster, but ribs have no editable sketch.\n"
+                "Top curves use the least-squares fit, refined until it meets the fit tolerance\n"
+                "(max control points doesn't apply). A rib whose fit still misses the tolerance,\n"
+                "or that Fusion rejects, falls back to sketch + extrude."
+            )
+
+            batch = qual.addBoolValueInput("batchSketch", "Batch build (one sketch, one extrude)", True, "", d_q["batch_sketch"])
+            set_tip(
+                batch,
+                "Draw every rib in one sketch and extrude them all at once",
+                "Timeline: 1 sketch, 1 extrude and about log2(ribs) moves instead of\n"
+                "a sketch and extrude per rib. Puts all ribs in one component.\n"
+                "Overrides Direct B-rep rib bodies."
+            )
+
+            dedupe = qual.addBoolValueInput("dedupeProfiles", "Reuse identical rib profiles", True, "", d_q["dedupe_profiles"])
+            set_tip(
+                dedupe,
+                "Ribs whose profiles match within the fit tolerance share one component",
+                "Repeats, also reversed end to end (with a symmetric tab layout), are added as\nextra occurrences instead of new sketches and extrudes.\n"
+                "Only with one component per rib. The run report shows how many were reused."
+            )
+
+            mesh_bodies = qual.addBoolValueInput("meshBodies", "Mesh bodies (render only)", True, "", d_q["mesh_bodies"])
+            set_tip(
+                mesh_bodies,
+                "Build ribs as triangle mesh bodies instead of solids",
+                "For sign-off renders: no sketches or extrudes, and no tabs. With one component\n"
+                "for all ribs the whole stack is a single mesh body. The run report compares\n"
+                "ms/rib with the last B-rep and sketch runs."
+            )
+
+            pipeline = qual.addBoolValueInput("pipelineRibs", "Overlap profile math with rib building", True, "", d_q["pipeline_ribs"])
+            set_tip(
+                pipeline,
+                "Compute profiles and curve fits on a worker thread, a few ribs ahead",
+                "The first ribs are sketched while later profiles are still being computed.\n"
+                "One component per rib only. The run report shows queue depth and how long\n"
+                "the rib loop waited on the worker."
+            )
+
+            parallel = qual.addBoolValueInput("parallelProfiles", "Compute profiles in parallel", True, "", d_q["parallel_profiles"])
+            set_tip(
+                parallel,
+                "Spread profile math across CPU cores",
+                "Uses a pool of worker processes for the rib height math, for runs large enough\nto repay the ~1 s pool start-up (in practice only without NumPy). Smaller runs,\nand a pool that doesn't answer in time, fall back to the serial path."
             )
 
             # ----------------------------
@@ -310,21 +427,84 @@ class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             # HOUSEKEEPING
             # ----------------------------
             delete_old = house.addBoolValueInput("deleteOld", "Delete previous OrganicFlowRibs_* containers", True, "", True)
-            set_tip(delete_old, "Auto-clean previous runs", "Deletes root-level occurrences whose component name starts with OrganicFlowRibs_.")
+            set_tip(delete_old, "Auto-clean previous runs", "Deletes the containers of earlier runs, found through the attributes each run is tagged with.")
+
+            live_preview = house.addBoolValueInput("livePreview", "Live preview", True, "", config.DEFAULTS_PREVIEW["live_preview"])
+            set_tip(
+                live_preview,
+                "Show a quick spline-only preview while editing",
+                "Every Nth rib's top curve at reduced points, capped at about 0.3 s of drawing.\n"
+                "Profiles are computed in the background; the preview appears once they are\n"
+                "ready and never holds up the dialog. OK reuses them."
+            )
+
+            mesh_preview = house.addBoolValueInput("meshPreview", "Preview as shaded mesh", True, "", config.DEFAULTS_PREVIEW["mesh_preview"])
+            set_tip(
+                mesh_preview,
+                "Draw every rib as one lightweight triangle mesh",
+                "Custom graphics only: no sketches or bodies are created, so it keeps up\n"
+                "while scrubbing sliders, even at hundreds of ribs."
+            )
+
+            show_report = house.addBoolValueInput("showReport", "Show run report", True, "", False)
+            set_tip(show_report, "Timing and fit-point summary after each run", "The report is always printed to the Text Commands window.")
+
+            incremental = house.addBoolValueInput("incremental", "Update previous run in place", True, "", False)
+            set_tip(
+                incremental,
+                "Rebuild only ribs whose profile or shape settings changed",
+                "Keeps unchanged ribs (re-placing them if the spacing changed), and the backer\n"
+                "and wall when their inputs are the same. One component per rib only;\n"
+                "other layouts rebuild everything."
+            )
+
+            keep_partial = house.addBoolValueInput("keepPartial", "Keep partial result on cancel", True, "", False)
+            set_tip(
+                keep_partial,
+                "What Cancel in the progress dialog leaves behind",
+                "Cancel stops between ribs and skips the backer and wall. Off: the partial\n"
+                "container is deleted. On: the ribs built so far are kept.\n"
+                "An in-place update is always kept."
+            )
+
+            bulk = house.addBoolValueInput("bulkBuild", "Bulk build (history capture off)", True, "", False)
+            set_tip(
+                bulk,
+                "Build ribs, backer and wall without timeline features",
+                "Turns design history off for the build and back on afterwards, so\n"
+                "hundreds of ribs don't each add a component, sketch and extrude to the timeline.\n"
+                "Existing timeline features are flattened into base features (you are asked first).\n"
+                "The run report compares ms/rib with the last parametric run."
+            )
 
             # Wire Execute/Destroy
             on_execute = CommandExecuteHandler(self.generator_module)
             cmd.execute.add(on_execute)
             self.handlers.append(on_execute)
 
+            on_preview = CommandPreviewHandler(self.generator_module)
+            cmd.executePreview.add(on_preview)
+            self.handlers.append(on_preview)
+
             # Preset apply
-            on_changed = InputChangedHandler()
+            on_changed = InputChangedHandler(self.generator_module)
             cmd.inputChanged.add(on_changed)
             self.handlers.append(on_changed)
 
-            on_destroy = CommandDestroyHandler()
+            on_destroy = CommandDestroyHandler(self.generator_module)
             cmd.destroy.add(on_destroy)
             self.handlers.append(on_destroy)
+
+            # Redraw the preview when background profiles land (the worker
+            # thread can't touch Fusion, so it only fires a custom event)
+            try:
+                app.unregisterCustomEvent(PROFILES_READY_EVENT)
+            except:
+                pass
+            on_ready = ProfilesReadyHandler(self.generator_module, cmd)
+            app.registerCustomEvent(PROFILES_READY_EVENT).add(on_ready)
+            self.handlers.append(on_ready)
+            self.generator_module.on_profiles_ready(lambda: app.fireCustomEvent(PROFILES_READY_EVENT))
         except:
             if ui:
                 import traceback
@@ -348,7 +528,40 @@ class CommandExecuteHandler(adsk.core.CommandEventHandler):
             print("EXECUTE FAILED:\n", traceback.format_exc())
             
 
+class CommandPreviewHandler(adsk.core.CommandEventHandler):
+    def __init__(self, generator_module):
+        super().__init__()
+        self.generator_module = generator_module
+
+    def notify(self, args):
+        try:
+            self.generator_module.execute_preview(args)
+        except:
+            # No modal errors while inputs are being edited
+            import traceback
+            print("PREVIEW FAILED:\n", traceback.format_exc())
+
+
+class ProfilesReadyHandler(adsk.core.CustomEventHandler):
+    def __init__(self, generator_module, command):
+        super().__init__()
+        self.generator_module = generator_module
+        self.command = command
+
+    def notify(self, args):
+        try:
+            self.generator_module.refresh_preview(self.command)
+        except:
+            # The dialog may have closed meanwhile
+            import traceback
+            print("PREVIEW REFRESH FAILED:\n", traceback.format_exc())
+
+
 class InputChangedHandler(adsk.core.InputChangedEventHandler):
+    def __init__(self, generator_module):
+        super().__init__()
+        self.generator_module = generator_module
+
     def notify(self, args):
         try:
             changed = args.input
@@ -356,12 +569,26 @@ class InputChangedHandler(adsk.core.InputChangedEventHandler):
                 return
             if changed.id == "presetPick":
                 presets.apply_preset_to_inputs(args.inputs, changed.selectedItem.name)
+            # Start on the profiles while the user is still in the dialog
+            self.generator_module.precompute_profiles(changed.parentCommand.commandInputs)
         except:
             # Avoid modal errors while dragging sliders/inputs
             pass
 
 
 class CommandDestroyHandler(adsk.core.CommandEventHandler):
-     def notify(self, args):
+    def __init__(self, generator_module):
+        super().__init__()
+        self.generator_module = generator_module
+
+    def notify(self, args):
         # Don't terminate here; it can kill execute.
-        pass
+        try:
+            self.generator_module.on_profiles_ready(None)
+            adsk.core.Application.get().unregisterCustomEvent(PROFILES_READY_EVENT)
+        except:
+            pass
+        try:
+            self.generator_module.clear_preview()
+        except:
+            pass
@@ -4,6 +4,10 @@
 import adsk.core
 import adsk.fusion
 import math
+import time
+import uuid
+
+from flow_core import smoothing
 
 
 # ----------------------------
@@ -80,51 +84,87 @@ def parse_float_list(csv_text):
 def smooth_series(values, passes=2):
     """
     Light smoothing to remove tiny kinks without killing large-scale shape.
-    Uses a simple 1D moving-average filter.
+    Equivalent to `passes` rounds of a [0.25, 0.5, 0.25] moving average with
+    pinned endpoints, done as one binomial kernel (see flow_core.smoothing).
     """
     if passes <= 0:
         return values
+    return smoothing.smooth_row(list(values), passes)
 
-    out = list(values)
-    for _ in range(passes):
-        if len(out) < 3:
-            return out
-        out = (
-            [out[0]] +
-            [
-                0.25 * out[i - 1] + 0.5 * out[i] + 0.25 * out[i + 1]
-                for i in range(1, len(out) - 1)
-            ] +
-            [out[-1]]
-        )
-    return out
+
+# ----------------------------
+# Attribute helpers
+# ----------------------------
+
+ATTR_GROUP = "OrganicFlowRibs"
+
+
+def get_attr(entity, name):
+    """Value of our attribute `name` on entity, or None."""
+    try:
+        attr = entity.attributes.itemByName(ATTR_GROUP, name)
+        return attr.value if attr else None
+    except:
+        return None
+
+
+def set_attr(entity, name, value):
+    """Adds or updates our attribute `name` on entity (stored as a string)."""
+    entity.attributes.add(ATTR_GROUP, name, str(value))
 
 
 # ----------------------------
-# Fusion cleanup helpers
+# Run registry
 # ----------------------------
+# Every generated container occurrence is tagged in ATTR_GROUP with
+#   container -- the name prefix (e.g. "OrganicFlowRibs_")
+#   run_id    -- new_run_id(), sorts oldest -> newest
+#   params    -- hash of the inputs it was built from
+# so previous runs are found with one Design.findAttributes lookup instead
+# of walking every root occurrence.
+
+def new_run_id():
+    """Time-ordered id for a generated container."""
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
 
-def delete_containers_with_prefix(root_component, prefix):
-    """
-    Deletes root-level occurrences whose component name starts with prefix.
-    Useful for cleaning previous runs.
-    """
-    occs = root_component.occurrences
-    to_delete = []
 
-    for occ in occs:
-        try:
-            comp = occ.component
-            if comp and comp.name.startswith(prefix):
-                to_delete.append(occ)
-        except:
-            pass
+def register_run(occ, prefix, run_id, param_hash):
+    set_attr(occ, "container", prefix)
+    set_attr(occ, "run_id", run_id)
+    set_attr(occ, "params", param_hash)
 
-    for occ in to_delete:
-        try:
-            occ.deleteMe()
-        except:
-            pass
+
+def find_runs(design, prefix):
+    """Root-level containers registered under prefix, oldest first."""
+    runs = []
+    for attr in design.findAttributes(ATTR_GROUP, "container"):
+        occ = adsk.fusion.Occurrence.cast(attr.parent)
+        if occ and occ.isValid and attr.value == prefix and occ.assemblyContext is None:
+            runs.append(occ)
+    runs.sort(key=lambda o: get_attr(o, "run_id") or "")
+    return runs
+
+
+def delete_entities(design, entities):
+    """
+    Deletes entities in one Design.deleteEntities call, falling back to one
+    deleteMe() per entity if the bulk delete is refused. Returns the count.
+    """
+    if not entities:
+        return 0
+    coll = adsk.core.ObjectCollection.create()
+    for e in entities:
+        coll.add(e)
+    try:
+        design.deleteEntities(coll)
+    except:
+        for e in entities:
+            try:
+                if e.isValid:
+                    e.deleteMe()
+            except:
+                pass
+    return len(entities)
 
 
 # ----------------------------
@@ -145,15 +185,3 @@ def build_tab_spans(tab_centers_in, tab_width_in, rib_length_in):
 
     spans.sort(key=lambda t: t[0], reverse=True)
     return spans
-
-def _delete_old_runs(root, prefix: str):
-    to_delete = []
-    for i in range(root.occurrences.count):
-        occ = root.occurrences.item(i)
-        if occ and occ.component and occ.component.name.startswith(prefix):
-            to_delete.append(occ)
-    for occ in reversed(to_delete):
-        try:
-            occ.deleteMe()
-        except:
-            pass
\ No newline at end of file